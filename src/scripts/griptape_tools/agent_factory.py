@@ -0,0 +1,32 @@
+from griptape.structures import Agent
+
+from .http_transport import use_shared_transport
+from .maya_tool import MayaTool
+
+
+def create_agent(prompt_driver=None, stream=False, warm=False, **tool_options):
+    """Builds the Maya agent shared by the chat window and the batch runner.
+
+    `tool_options` are passed on to MayaTool (cancel_event, callbacks,
+    batch_mode). Without a prompt driver the Griptape default is used. With
+    `warm` the agent built by the startup warm-up is taken when there is one,
+    so its driver, client and connection are already set up. The prompt
+    driver sends its requests through the shared transport in http_transport.
+    """
+    if warm and prompt_driver is None:
+        from .warmup import take_warm_agent
+
+        agent = take_warm_agent()
+        if agent is not None and agent.stream == stream:
+            for tool in agent.tools:
+                if isinstance(tool, MayaTool):
+                    for name, value in tool_options.items():
+                        setattr(tool, name, value)
+            return agent
+
+    options = {"tools": [MayaTool(**tool_options)], "stream": stream}
+    if prompt_driver is not None:
+        options["prompt_driver"] = prompt_driver
+    agent = Agent(**options)
+    use_shared_transport(agent.prompt_driver)
+    return agent
@@ -0,0 +1,7 @@
+# API keys the tools use, with the page to get each one from. Kept apart from
+# api_keys.py so startup can read them without importing PySide.
+API_KEYS = {
+    "OPENAI_API_KEY": "https://platform.openai.com/api-keys",
+    "GT_CLOUD_API_KEY": "https://cloud.griptape.ai",
+    # Add more keys here if needed
+}
@@ -12,12 +12,7 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
-# api_keys.py
-API_KEYS = {
-    "OPENAI_API_KEY": "https://platform.openai.com/api-keys",
-    "GT_CLOUD_API_KEY": "https://cloud.griptape.ai",
-    # Add more keys here if needed
-}
+from .api_key_names import API_KEYS
 
 
 class APIKeyManager(QDialog):
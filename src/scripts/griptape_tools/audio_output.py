@@ -0,0 +1,147 @@
+import math
+import wave
+
+import numpy as np
+from scipy import signal
+
+try:
+    import soundfile
+except ImportError:  # Only needed for compressed formats
+    soundfile = None
+
+# Sample rate speech models work at; anything above is wasted upload
+SPEECH_RATE = 16000
+# Filter taps per polyphase branch; more gives a sharper anti-alias cutoff
+TAPS_PER_PHASE = 48
+# soundfile (format, subtype) for each compressed file format
+COMPRESSED_FORMATS = {
+    "flac": ("FLAC", "PCM_16"),
+    "opus": ("OGG", "OPUS"),
+}
+
+
+class StreamingResampler:
+    """Polyphase FIR resampler that works block by block.
+
+    The anti-alias filter is designed once with scipy's firwin and split into
+    one branch per output phase, so each output sample costs TAPS_PER_PHASE
+    multiply-adds. The last input samples are kept between blocks, so the
+    result is the same however the audio is split up.
+    """
+
+    def __init__(self, input_rate, output_rate=SPEECH_RATE, taps=TAPS_PER_PHASE):
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.taps = taps
+        lowpass = signal.firwin(
+            taps * self.up, 1.0 / max(self.up, self.down), window=("kaiser", 6.0)
+        )
+        # phases[p, j] is tap p + j * up, the branch used for output phase p
+        self.phases = (lowpass * self.up).reshape(taps, self.up).T.astype(np.float32)
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._consumed = 0  # input samples seen before the current block
+        self._produced = 0  # output samples returned so far
+
+    def process(self, samples):
+        """Resamples a block of mono samples; returns the output available so far."""
+        if not len(samples):
+            return np.zeros(0, dtype=np.float32)
+        buffer = np.concatenate([self._history, samples.astype(np.float32)])
+        last = self._consumed + len(samples) - 1
+        end = -(-(last + 1) * self.up // self.down)  # ceil
+        outputs = np.arange(self._produced, end)
+
+        positions = outputs * self.down
+        newest = positions // self.up - self._consumed + self.taps - 1
+        windows = buffer[newest[:, None] - np.arange(self.taps)]
+        resampled = np.einsum("ij,ij->i", windows, self.phases[positions % self.up])
+
+        self._history = buffer[len(buffer) - (self.taps - 1) :]
+        self._consumed += len(samples)
+        self._produced = end
+        return resampled
+
+
+def compressed_formats():
+    """The compressed file formats this install can write."""
+    if soundfile is None:
+        return []
+    available = soundfile.available_subtypes
+    return [
+        name
+        for name, (file_format, subtype) in COMPRESSED_FORMATS.items()
+        if subtype in available(file_format)
+    ]
+
+
+class AudioOutput:
+    """Writes recorded float blocks to a file as they arrive.
+
+    With `output_rate` the audio is mixed down to mono and resampled on the
+    fly. "wav" is 16-bit PCM through the wave module; "flac" and "opus" need
+    the optional soundfile package.
+    """
+
+    def __init__(
+        self, path, sample_rate, channels, output_rate=None, file_format="wav"
+    ):
+        self.path = path
+        self.resampler = None
+        if output_rate and output_rate != sample_rate:
+            self.resampler = StreamingResampler(sample_rate, output_rate)
+        self.channels = 1 if output_rate else channels
+        self.sample_rate = output_rate or sample_rate
+        self.file_format = file_format
+        # Scratch buffers for the 16-bit conversion, reused across blocks
+        self._scaled = None
+        self._pcm = None
+
+        if file_format == "wav":
+            self._file = wave.open(path, "wb")
+            self._file.setnchannels(self.channels)
+            self._file.setsampwidth(2)  # 16-bit PCM
+            self._file.setframerate(self.sample_rate)
+        elif file_format in COMPRESSED_FORMATS:
+            if file_format not in compressed_formats():
+                raise ValueError(
+                    f"Writing {file_format} needs soundfile with support for it"
+                )
+            container, subtype = COMPRESSED_FORMATS[file_format]
+            self._file = soundfile.SoundFile(
+                path,
+                "w",
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                format=container,
+                subtype=subtype,
+            )
+        else:
+            raise ValueError(f"Unknown audio format '{file_format}'")
+
+    def write(self, block):
+        """Writes float samples of shape (frames, channels)."""
+        if self.channels == 1 and block.ndim == 2:
+            block = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        if self.resampler is not None:
+            block = self.resampler.process(block)
+        if self.file_format == "wav":
+            self._file.writeframes(self._to_pcm16(block))
+        else:
+            self._file.write(block)
+
+    def _to_pcm16(self, block):
+        if self._scaled is None or self._scaled.shape[1:] != block.shape[1:]:
+            self._scaled = None
+        if self._scaled is None or len(self._scaled) < len(block):
+            self._scaled = np.empty(block.shape, dtype=np.float32)
+            self._pcm = np.empty(block.shape, dtype=np.int16)
+        scaled = self._scaled[: len(block)]
+        samples = self._pcm[: len(block)]
+        np.multiply(block, 32767, out=scaled)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        np.copyto(samples, scaled, casting="unsafe")
+        return samples
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,258 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Scene files picked up when a folder is given
+SCENE_EXTENSIONS = (".ma", ".mb")
+DEFAULT_WORKERS = 2
+DEFAULT_RETRIES = 1
+
+# Set in each worker process by _init_worker
+_prompt_driver_spec = None
+
+
+def collect_scene_files(paths):
+    """Expands folders into the Maya scene files under them, keeping the order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in sorted(os.walk(path)):
+                files.extend(
+                    os.path.join(folder, name)
+                    for name in sorted(names)
+                    if name.lower().endswith(SCENE_EXTENSIONS)
+                )
+        else:
+            files.append(path)
+    return files
+
+
+def load_object(spec):
+    """Imports "package.module:attribute" and returns the attribute."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected 'module:attribute', got '{spec}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def create_prompt_driver(spec):
+    """Returns the prompt driver named by `spec`, or None for the default.
+
+    The spec points at a driver instance or at a callable that returns one,
+    e.g. "my_studio.drivers:create_driver". Tests can point it at a fake.
+    """
+    if not spec:
+        return None
+    driver = load_object(spec)
+    return driver() if callable(driver) else driver
+
+
+def _init_worker(prompt_driver_spec):
+    """Starts Maya once per worker process; the process is reused for many files."""
+    # Maya is only imported in the workers, so the parent process doesn't need it
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+
+    global _prompt_driver_spec
+    _prompt_driver_spec = prompt_driver_spec
+
+
+def process_scene(path, prompt, save=False):
+    """Opens a scene, runs the prompt on it and returns a result record (worker)."""
+    import maya.cmds as cmds
+
+    from .agent_factory import create_agent
+
+    start = time.perf_counter()
+    record = {"file": path, "pid": os.getpid()}
+    try:
+        cmds.file(path, open=True, force=True, prompt=False)
+        # A fresh agent per file, so conversations don't leak between scenes
+        agent = create_agent(
+            prompt_driver=create_prompt_driver(_prompt_driver_spec), batch_mode=True
+        )
+        record["output"] = agent.run(prompt).output.value
+        if save:
+            cmds.file(save=True, force=True)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["elapsed"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_files(
+    prompt,
+    files,
+    output,
+    workers=DEFAULT_WORKERS,
+    retries=DEFAULT_RETRIES,
+    save=False,
+    prompt_driver=None,
+    files_per_worker=None,
+):
+    """Runs the prompt on every file with a pool of warm mayapy workers.
+
+    Each file's record is appended to `output` as one JSON line as soon as it
+    is final. Failed files are retried up to `retries` times. At most
+    `workers` files are submitted at once, so every submitted file is running.
+    A crashed worker breaks the pool and fails all of them; the pool is then
+    replaced and those files are run again one at a time, without counting
+    the attempt, until the crash is pinned on the file that caused it.
+    Returns the number of files that failed.
+    """
+    attempts = {path: 0 for path in files}
+    pending = deque(files)
+    # Files that were running when a worker crashed; each runs alone
+    suspects = deque()
+    finished = 0
+    failed = 0
+    # Spawned workers start clean instead of inheriting the parent's state
+    context = multiprocessing.get_context("spawn")
+
+    with open(output, "a", encoding="utf-8") as stream:
+
+        def finish(path, record):
+            nonlocal finished, failed
+            record["attempts"] = attempts[path]
+            stream.write(json.dumps(record, default=repr) + "\n")
+            stream.flush()
+            finished += 1
+            failed += record["status"] != "ok"
+            print(
+                f"[Griptape] {finished}/{len(files)} {path}: {record['status']}",
+                file=sys.stderr,
+            )
+
+        def retry(path, record, queue):
+            if record["status"] == "ok" or attempts[path] > retries:
+                finish(path, record)
+                return
+            print(f"[Griptape] Retrying {path}: {record['error']}", file=sys.stderr)
+            queue.append(path)
+
+        while pending or suspects:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(prompt_driver,),
+                max_tasks_per_child=files_per_worker,
+            ) as pool:
+                futures = {}
+                crashed = []
+
+                def submit(path):
+                    attempts[path] += 1
+                    futures[pool.submit(process_scene, path, prompt, save)] = path
+
+                while (pending or suspects or futures) and not crashed:
+                    if suspects:
+                        if not futures:
+                            submit(suspects.popleft())
+                    else:
+                        while pending and len(futures) < workers:
+                            submit(pending.popleft())
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = futures.pop(future)
+                        try:
+                            record = future.result()
+                        except BrokenProcessPool:
+                            crashed.append(path)
+                            continue
+                        retry(path, record, pending)
+
+                # The rest of the running files fail with the pool too
+                crashed.extend(futures.values())
+
+            if len(crashed) == 1:
+                record = {
+                    "file": crashed[0],
+                    "status": "error",
+                    "error": "The worker process crashed",
+                }
+                retry(crashed[0], record, suspects)
+            else:
+                # Any of them may have crashed the worker; none is charged
+                for path in crashed:
+                    attempts[path] -= 1
+                suspects.extend(crashed)
+    return failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="mayapy -m griptape_tools.batch_runner",
+        description="Runs a Griptape agent prompt against many Maya scene files "
+        "with a pool of headless mayapy workers, writing one JSON line per file.",
+    )
+    parser.add_argument("prompt", help="The prompt to run on every scene.")
+    parser.add_argument(
+        "paths", nargs="+", help="Scene files, or folders to search for .ma/.mb files."
+    )
+    parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="JSONL file to append to."
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of mayapy worker processes.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Times a failed file is tried again.",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Save each scene after the prompt ran."
+    )
+    parser.add_argument(
+        "--prompt-driver",
+        help="'module:attribute' naming a prompt driver, or a callable returning "
+        "one. Defaults to Griptape's configured driver.",
+    )
+    parser.add_argument(
+        "--files-per-worker",
+        type=int,
+        help="Restart a worker after this many files, to cap its memory use.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_scene_files(args.paths)
+    if not files:
+        print("[Griptape] No scene files found.", file=sys.stderr)
+        return 1
+    failed = run_files(
+        args.prompt,
+        files,
+        args.output,
+        workers=args.workers,
+        retries=args.retries,
+        save=args.save,
+        prompt_driver=args.prompt_driver,
+        files_per_worker=args.files_per_worker,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
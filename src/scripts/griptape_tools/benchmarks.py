@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+
+import maya.cmds as cmds
+import numpy as np
+
+from .audio_output import SPEECH_RATE, AudioOutput, compressed_formats
+from .command_compiler import compile_commands
+from .maya_executor import BATCH_MODES, run_script
+
+
+def benchmark_execution_modes(count=1000, repeats=3):
+    """Times creating `count` objects with each MayaTool execution mode.
+
+    Run from the Script Editor in a scratch scene. Every created node is
+    deleted again after each run.
+    """
+    command_list = [
+        f"cmds.spaceLocator(name='gtBenchLocator{i}')" for i in range(count)
+    ]
+    script = compile_commands(command_list)
+
+    timings = {}
+    for mode in BATCH_MODES:
+        best = None
+        for _ in range(repeats):
+            namespace, results = script.create_namespace(cmds=cmds)
+            start = time.perf_counter()
+            run_script(script, namespace, mode)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            cmds.delete([name for result in results for name in result["value"]])
+        timings[mode] = best
+
+    print(f"[Griptape] Creating {count} locators (best of {repeats}):")
+    for mode, elapsed in timings.items():
+        print(f"  {mode:<14} {elapsed * 1000:8.1f} ms")
+    return timings
+
+
+def synthetic_speech(seconds, sample_rate):
+    """A voice-like test signal: a wavering pitch with harmonics, in syllable
+    bursts, over a little background noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 20))
+    syllables = np.clip(np.sin(2 * np.pi * 3 * t), 0, None)
+    noise = rng.normal(0, 0.01, len(t))
+    return (0.2 * voice * syllables + noise).astype(np.float32)
+
+
+def benchmark_audio_encoding(seconds=10, sample_rate=44100, block_size=1024):
+    """Compares recording output stages: bytes per second of speech and the
+    CPU time spent encoding each second.
+
+    Audio is fed block by block, as the recorder's writer does. Compressed
+    formats are only included when soundfile can write them.
+    """
+    audio = synthetic_speech(seconds, sample_rate)[:, None]
+    stages = [("wav", None), ("wav", SPEECH_RATE)]
+    stages += [(file_format, SPEECH_RATE) for file_format in compressed_formats()]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for file_format, output_rate in stages:
+            path = os.path.join(folder, f"benchmark.{file_format}")
+            start = time.process_time()
+            output = AudioOutput(
+                path, sample_rate, 1, output_rate=output_rate, file_format=file_format
+            )
+            for offset in range(0, len(audio), block_size):
+                output.write(audio[offset : offset + block_size])
+            output.close()
+            cpu = time.process_time() - start
+            label = f"{file_format} {(output_rate or sample_rate) / 1000:g} kHz"
+            results[label] = {
+                "bytes_per_second": os.path.getsize(path) / seconds,
+                "cpu_ms_per_second": cpu * 1000 / seconds,
+            }
+
+    print(f"[Griptape] Encoding {seconds}s of speech-like audio:")
+    for label, result in results.items():
+        print(
+            f"  {label:<16} {result['bytes_per_second'] / 1024:8.1f} KB/s"
+            f"  {result['cpu_ms_per_second']:6.2f} ms CPU/s"
+        )
+    return results
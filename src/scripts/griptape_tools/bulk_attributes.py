@@ -0,0 +1,279 @@
+import ast
+import math
+import operator
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+import numpy as np
+
+from .maya_executor import run_batch
+from .modifier_command import apply_modifier
+
+# Name of the undo chunk each write_attributes call makes
+UNDO_CHUNK_NAME = "set_attributes"
+
+# What value expressions may use besides numbers, arithmetic and `n`
+EXPRESSION_MODULES = {
+    "np": (
+        np,
+        "pi e arange linspace zeros ones full array sin cos tan sqrt abs radians "
+        "degrees stack column_stack tile repeat cumsum",
+    ),
+    "np.random": (np.random, "uniform normal rand randint random"),
+    "math": (math, "pi e tau sin cos tan sqrt radians degrees"),
+}
+EXPRESSION_NAMES = {
+    f"{prefix}.{name}": getattr(module, name)
+    for prefix, (module, names) in EXPRESSION_MODULES.items()
+    for name in names.split()
+}
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+# Largest exponent allowed, so "10 ** 10 ** 10" fails instead of hanging
+MAX_EXPONENT = 100
+
+
+def resolve_nodes(selector=None):
+    """Returns the dependency nodes matching a selector as (names, MObjects).
+
+    The selector is a name or wildcard pattern ("pCube*"), a list of those, or
+    empty for the active selection.
+    """
+    selection = om.MSelectionList()
+    if not selector:
+        selection = om.MGlobal.getActiveSelectionList()
+    else:
+        for pattern in [selector] if isinstance(selector, str) else selector:
+            try:
+                selection.add(pattern)
+            except RuntimeError:
+                raise ValueError(f"No nodes match '{pattern}'")
+
+    names = []
+    nodes = []
+    for i in range(selection.length()):
+        obj = selection.getDependNode(i)
+        nodes.append(obj)
+        if obj.hasFn(om.MFn.kDagNode):
+            names.append(om.MFnDagNode(obj).partialPathName())
+        else:
+            names.append(om.MFnDependencyNode(obj).name())
+    return names, nodes
+
+
+def _leaf_plugs(obj, attribute):
+    """Returns the numeric plugs behind an attribute (children for compounds)."""
+    plug = om.MFnDependencyNode(obj).findPlug(attribute, False)
+    if plug.isCompound:
+        return [plug.child(i) for i in range(plug.numChildren())]
+    return [plug]
+
+
+def _is_angle(plug):
+    attr = plug.attribute()
+    return (
+        attr.hasFn(om.MFn.kUnitAttribute)
+        and om.MFnUnitAttribute(attr).unitType() == om.MFnUnitAttribute.kAngle
+    )
+
+
+def _read_plugs(plugs_per_node, angles):
+    """Reads a (nodes, children) array of values; angles in degrees."""
+    return np.array(
+        [
+            [
+                plug.asMAngle().asDegrees() if angle else plug.asDouble()
+                for plug, angle in zip(plugs, angles)
+            ]
+            for plugs in plugs_per_node
+        ],
+        dtype=np.float64,
+    ).reshape(len(plugs_per_node), len(angles))
+
+
+def read_attributes(selector, attributes):
+    """Reads numeric attributes from every matching node in one pass.
+
+    Returns the node names and a dict of attribute -> array of shape (nodes,)
+    for simple attributes or (nodes, children) for compounds like translate.
+    Angles are in degrees. Must run on the main thread.
+    """
+    names, nodes = resolve_nodes(selector)
+    values = {}
+    for attribute in attributes:
+        plugs_per_node = [_leaf_plugs(obj, attribute) for obj in nodes]
+        angles = [_is_angle(plug) for plug in plugs_per_node[0]] if nodes else []
+        array = _read_plugs(plugs_per_node, angles)
+        values[attribute] = array[:, 0] if array.shape[1] == 1 else array
+    return names, values
+
+
+class _ExpressionEvaluator(ast.NodeVisitor):
+    """Evaluates a value expression without eval.
+
+    Allows numbers, lists and tuples, arithmetic, `n`, slicing, and calls to
+    the functions in EXPRESSION_NAMES; anything else raises ValueError.
+    """
+
+    def __init__(self, count):
+        self.count = count
+
+    def generic_visit(self, node):
+        raise ValueError(f"'{ast.unparse(node)}' isn't allowed in a value expression")
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if node.value is None or isinstance(node.value, (int, float)):
+            return node.value
+        return self.generic_visit(node)
+
+    def visit_List(self, node):
+        return [self.visit(item) for item in node.elts]
+
+    def visit_Tuple(self, node):
+        return tuple(self.visit(item) for item in node.elts)
+
+    def visit_Name(self, node):
+        if node.id == "n":
+            return self.count
+        return self._lookup(node)
+
+    def visit_Attribute(self, node):
+        return self._lookup(node)
+
+    def _lookup(self, node):
+        name = ast.unparse(node)
+        if name not in EXPRESSION_NAMES:
+            raise ValueError(f"Unknown name '{name}' in a value expression")
+        return EXPRESSION_NAMES[name]
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in BINARY_OPERATORS:
+            return self.generic_visit(node)
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow) and np.any(np.abs(right) > MAX_EXPONENT):
+            raise ValueError(f"Exponents above {MAX_EXPONENT} aren't allowed")
+        return BINARY_OPERATORS[type(node.op)](left, right)
+
+    def visit_UnaryOp(self, node):
+        if type(node.op) not in UNARY_OPERATORS:
+            return self.generic_visit(node)
+        return UNARY_OPERATORS[type(node.op)](self.visit(node.operand))
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, (ast.Name, ast.Attribute)):
+            return self.generic_visit(node)
+        function = self._lookup(node.func)
+        if not callable(function) or any(k.arg is None for k in node.keywords):
+            return self.generic_visit(node)
+        args = [self.visit(arg) for arg in node.args]
+        kwargs = {k.arg: self.visit(k.value) for k in node.keywords}
+        return function(*args, **kwargs)
+
+    def visit_Subscript(self, node):
+        return self.visit(node.value)[self.visit(node.slice)]
+
+    def visit_Slice(self, node):
+        return slice(
+            *(
+                self.visit(part) if part else None
+                for part in (node.lower, node.upper, node.step)
+            )
+        )
+
+
+def evaluate_expression(text, count):
+    """Evaluates a value expression such as "np.random.uniform(-10, 10, (n, 3))".
+
+    Raises ValueError for anything outside the small set of operations and
+    NumPy/math functions it allows.
+    """
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid value expression '{text}': {e.msg}")
+    return _ExpressionEvaluator(count).visit(tree)
+
+
+def evaluate_values(value, count):
+    """Turns a JSON value or a NumPy expression string into an array.
+
+    Expressions can use arithmetic, `n` (the number of nodes) and common
+    `np`, `np.random` and `math` functions, for example
+    "np.random.uniform(-10, 10, (n, 3))".
+    """
+    if isinstance(value, str):
+        value = evaluate_expression(value, count)
+    return np.asarray(value, dtype=np.float64)
+
+
+def write_attributes(selector, values, relative=False):
+    """Sets numeric attributes on every matching node with one MDGModifier.
+
+    `values` maps attribute names to arrays (or expressions, see
+    evaluate_values). Each array is broadcast to (nodes, children), so a
+    single [x, y, z] applies to every node. With `relative` the values are
+    added to the current ones. Angles are in degrees. All values are checked
+    before the first is set. Must run on the main thread.
+
+    Returns the number of nodes changed. The modifier is applied through an
+    undoable command with refresh suspended, so the edit is a single entry on
+    Maya's undo queue; undo_last_write reverts it.
+    """
+    _, nodes = resolve_nodes(selector)
+    if not nodes:
+        return 0
+
+    modifier = om.MDGModifier()
+    for attribute, value in values.items():
+        plugs_per_node = [_leaf_plugs(obj, attribute) for obj in nodes]
+        width = len(plugs_per_node[0])
+        array = evaluate_values(value, len(nodes))
+        if width == 1 and array.ndim == 1 and array.shape[0] == len(nodes):
+            array = array[:, np.newaxis]
+        try:
+            array = np.broadcast_to(array, (len(nodes), width))
+        except ValueError:
+            raise ValueError(
+                f"Values for '{attribute}' have shape {array.shape}; expected "
+                f"({len(nodes)}, {width}) or something that broadcasts to it"
+            )
+
+        angles = [_is_angle(plug) for plug in plugs_per_node[0]]
+        if relative:
+            array = array + _read_plugs(plugs_per_node, angles)
+
+        for plugs, row in zip(plugs_per_node, array.tolist()):
+            for plug, number, angle in zip(plugs, row, angles):
+                if angle:
+                    modifier.newPlugValueMAngle(
+                        plug, om.MAngle(number, om.MAngle.kDegrees)
+                    )
+                else:
+                    modifier.newPlugValueDouble(plug, number)
+
+    run_batch(
+        lambda: apply_modifier(modifier),
+        suspend_refresh=True,
+        chunk_name=UNDO_CHUNK_NAME,
+    )
+    return len(nodes)
+
+
+def undo_last_write():
+    """Undoes the most recent write_attributes call, if it is the last entry on
+    Maya's undo queue. Returns False otherwise."""
+    if cmds.undoInfo(q=True, undoName=True) != UNDO_CHUNK_NAME:
+        return False
+    cmds.undo()
+    return True
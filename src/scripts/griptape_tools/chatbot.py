@@ -1,37 +1,143 @@
-import threading
+import html
+import os
+import time
+import uuid
 
 import maya.cmds as cmds
 import maya.OpenMayaUI as omui
 import maya.utils
-from griptape.structures import Agent
+from griptape.artifacts import TextArtifact
+from griptape.events import (
+    ActionChunkEvent,
+    EventListener,
+    StartPromptEvent,
+    TextChunkEvent,
+)
+from griptape.memory.structure import Run
 from griptape.utils import Stream
-from PySide6.QtCore import QEvent, Qt, Signal
-from PySide6.QtGui import QTextCursor
+from PySide6.QtCore import QEvent, Qt, QTimer, Signal
 from PySide6.QtWidgets import (
+    QApplication,
     QHBoxLayout,
+    QLabel,
     QMainWindow,
     QPushButton,
     QSizePolicy,
-    QTextBrowser,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 from shiboken6 import wrapInstance
 
+from .agent_factory import create_agent
+from .conversation_store import (
+    LOAD_LAST_N,
+    create_conversation_memory,
+    get_conversation_path,
+)
+from .macros import save_macro
+from .markdown_stream import StreamingMarkdownRenderer, render_blocks
 from .maya_tool import MayaTool
+from .request_queue import RequestCancelled, RequestQueue
+from .response_cache import (
+    ResponseCache,
+    cache_key,
+    conversation_digest,
+    scene_fingerprint,
+)
+from .stream_buffer import StreamBuffer
+from .transcript import MAX_BLOCKS, TranscriptModel, TranscriptView
+
+# How often streamed tokens are flushed into the chat history
+FLUSH_INTERVAL_MS = 50
+# How often the queue status line is refreshed while requests are pending
+STATUS_INTERVAL_MS = 250
+# Command source shown per MayaTool progress line
+COMMAND_SOURCE_LENGTH = 60
 
 
 class ChatbotUI(QWidget):
     update_signal = Signal(str)
 
-    def __init__(self, parent=None):
+    def __init__(
+        self,
+        parent=None,
+        flush_interval_ms=FLUSH_INTERVAL_MS,
+        coalesce=True,
+        max_blocks=MAX_BLOCKS,
+        load_last_n=LOAD_LAST_N,
+        use_cache=True,
+    ):
         super().__init__(parent)
         self.setWindowTitle("Griptape Chat")
-        self.agent = Agent(tools=[MayaTool()], stream=True)
+
+        # One worker per chat session, so messages run one after another
+        # against the agent's conversation memory instead of concurrently
+        self.request_queue = RequestQueue(self.generate_response)
+        self.destroyed.connect(self.request_queue.shutdown)
+        # Progress of a sliced MayaTool run as (done, total), shown in the status line
+        self.command_progress = None
+        # Uses the agent warmed up after Maya started, when that is turned on
+        self.agent = create_agent(
+            stream=True,
+            warm=True,
+            cancel_event=self.request_queue.cancel_event,
+            progress_callback=self.show_command_progress,
+            command_callback=self.push_command_event,
+        )
+        self.maya_tool = next(
+            tool for tool in self.agent.tools if isinstance(tool, MayaTool)
+        )
+        # A cancelled run raises RequestCancelled from its next prompt or
+        # chunk; the driver must not retry it
+        driver = self.agent.prompt_driver
+        driver.ignored_exception_types = (
+            *driver.ignored_exception_types,
+            RequestCancelled,
+        )
+
+        # Answers to repeated prompts in an unchanged scene come from disk.
+        # Ctrl+Enter (or Ctrl+click on Send) asks the agent anyway.
+        self.response_cache = None
+        if use_cache:
+            self.response_cache = ResponseCache(get_response_cache_dir())
+
+        # Streamed tokens are queued by the worker and flushed by a main-thread
+        # timer. With coalesce=False every token blocks on the main thread
+        # (the old behaviour), which is handy for comparing tokens/sec.
+        self.coalesce = coalesce
+        self.stream_buffer = StreamBuffer()
+        # True from begin_response until the reply's last flush
+        self.response_active = False
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_interval_ms)
+        self.flush_timer.timeout.connect(self.flush_stream)
+
+        # Assistant replies are rendered as Markdown, one block at a time
+        self.markdown_renderer = StreamingMarkdownRenderer()
+
+        # Only the newest blocks stay in memory; older ones spill to disk
+        self.transcript = TranscriptModel(
+            get_transcript_spill_path(), max_blocks=max_blocks, parent=self
+        )
+        self.destroyed.connect(self.transcript.close)
+
+        # Conversation memory lives in an append-only log per scene file and
+        # is swapped in lazily when the scene changes between messages
+        self.load_last_n = load_last_n
+        self.conversation_path = None
+
+        # Listens for spoken messages while the Voice button is on
+        self.voice_pipeline = None
+        self.destroyed.connect(self.teardown_voice_input)
+
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(STATUS_INTERVAL_MS)
+        self.status_timer.timeout.connect(self.update_queue_status)
 
         self.setup_ui()
         self.update_signal.connect(self.update_chat)
+        self.sync_conversation()
 
         # 🚀 Set focus on the input field when the UI opens
         self.input_field.setFocus()
@@ -40,21 +146,19 @@ class ChatbotUI(QWidget):
         layout = QVBoxLayout(self)
 
         # Chat history (forces full width)
-        self.chat_history = QTextBrowser()
-        self.chat_history.setReadOnly(True)
+        self.chat_history = TranscriptView()
+        self.chat_history.setModel(self.transcript)
+        self.chat_history.top_reached.connect(self.load_earlier_turns)
         self.chat_history.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.Expanding
         )  # Allow full width
         self.chat_history.setStyleSheet("""
-            QTextBrowser {
+            QListView {
                 background-color: #1E1E1E;
                 color: #E0E0E0;
                 border: 1px solid #333;
                 padding: 5px;
                 font-size: 12px;
-                word-wrap: normal;  /* Prevent aggressive wrapping */
-                white-space: pre-wrap;  /* Preserve formatting but allow wrapping */
-                width: 100%;
             }
         """)
         layout.addWidget(self.chat_history)
@@ -79,11 +183,7 @@ class ChatbotUI(QWidget):
         self.input_field.installEventFilter(self)
         input_layout.addWidget(self.input_field)
 
-        send_button = QPushButton("Send")
-        send_button.setSizePolicy(
-            QSizePolicy.Fixed, QSizePolicy.Fixed
-        )  # Keep button fixed size
-        send_button.setStyleSheet("""
+        button_style = """
             QPushButton {
                 background-color: #444;
                 color: #FFF;
@@ -94,73 +194,418 @@ class ChatbotUI(QWidget):
             QPushButton:hover {
                 background-color: #666;
             }
-        """)
-        send_button.clicked.connect(self.send_message)
+        """
+        send_button = QPushButton("Send")
+        send_button.setSizePolicy(
+            QSizePolicy.Fixed, QSizePolicy.Fixed
+        )  # Keep button fixed size
+        send_button.setStyleSheet(button_style)
+        send_button.clicked.connect(
+            lambda: self.send_message(
+                bypass_cache=bool(QApplication.keyboardModifiers() & Qt.ControlModifier)
+            )
+        )
         input_layout.addWidget(send_button)
 
+        # Speak instead of typing; each utterance is sent as a message
+        self.voice_button = QPushButton("Voice")
+        self.voice_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.voice_button.setStyleSheet(button_style)
+        self.voice_button.setCheckable(True)
+        self.voice_button.toggled.connect(self.toggle_voice_input)
+        input_layout.addWidget(self.voice_button)
+
+        # Keeps the last command list that worked for replaying without the agent
+        self.macro_button = QPushButton("Save Macro")
+        self.macro_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.macro_button.setStyleSheet(button_style)
+        self.macro_button.clicked.connect(self.save_last_commands)
+        input_layout.addWidget(self.macro_button)
+
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.stop_button.setStyleSheet(button_style)
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_response)
+        input_layout.addWidget(self.stop_button)
+
         layout.addLayout(input_layout)
 
+        # Queue depth and wait time, so it's clear why a reply hasn't started
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #999; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
     def eventFilter(self, obj, event):
         if obj == self.input_field and event.type() == QEvent.KeyPress:
             if (
                 event.key() == Qt.Key_Return
                 and not event.modifiers() & Qt.ShiftModifier
             ):
-                self.send_message()
+                self.send_message(
+                    bypass_cache=bool(event.modifiers() & Qt.ControlModifier)
+                )
                 return True
         return super().eventFilter(obj, event)
 
-    def send_message(self):
-        message = self.input_field.toPlainText().strip()
+    def send_message(self, message=None, bypass_cache=False):
+        """Queues a message; without one, sends what's in the input field."""
+        if message is None:
+            message = self.input_field.toPlainText().strip()
+            self.input_field.clear()
         if not message:
             return
 
-        self.input_field.clear()
+        self.request_queue.submit(message, bypass_cache=bypass_cache)
+        self.update_queue_status()
+        self.status_timer.start()
 
-        # Ensures user messages start on a new line
-        self.append_chat(f"You: {message}", "#FFD700", newline=True)
+    def toggle_voice_input(self, enabled):
+        """Starts or stops listening for spoken messages."""
+        if not enabled:
+            if self.voice_pipeline is not None:
+                self.voice_pipeline.stop()
+                self.voice_pipeline = None
+            return
 
-        threading.Thread(target=self.generate_response, args=(message,)).start()
+        # Imported here so the chat works without an audio device
+        from .voice_input import VoicePromptPipeline
 
-    def append_to_last_chat(self, text):
-        """Appends text to the last Assistant message without creating new lines."""
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(QTextCursor.End)  # Move to the end of the text
-        cursor.insertText(text)  # Append new text at the end
-        self.chat_history.setTextCursor(cursor)
+        self.voice_pipeline = VoicePromptPipeline(
+            on_text=lambda text: maya.utils.executeDeferred(self.send_message, text)
+        )
+        self.voice_pipeline.start().add_done_callback(self.voice_input_finished)
+
+    def teardown_voice_input(self):
+        """Stops listening without sending what was still being transcribed."""
+        if self.voice_pipeline is not None:
+            self.voice_pipeline.teardown()
+            self.voice_pipeline = None
+
+    def voice_input_finished(self, future):
+        """Called when the microphone closes; unchecks Voice if it failed."""
+        if future.exception():
+            maya.utils.executeDeferred(self.voice_input_failed, future.exception())
+
+    def voice_input_failed(self, error):
+        cmds.warning(f"Voice input stopped: {error}")
+        self.voice_button.setChecked(False)
+
+    def save_last_commands(self):
+        """Saves MayaTool's last successful command list as a named macro."""
+        command_list = self.maya_tool.last_command_list
+        if not command_list:
+            cmds.warning("No commands have run successfully yet.")
+            return
+        result = cmds.promptDialog(
+            title="Save Macro",
+            message="Macro name:",
+            button=["Save", "Cancel"],
+            defaultButton="Save",
+            cancelButton="Cancel",
+            dismissString="Cancel",
+        )
+        name = cmds.promptDialog(q=True, text=True).strip()
+        if result != "Save" or not name:
+            return
 
-    def generate_response(self, message):
-        try:
-            maya.utils.executeInMainThreadWithResult(
-                self.append_chat, "<br>Assistant: ", "#87CEFA"
+        macro = save_macro(name, command_list)
+        parameters = ", ".join(
+            f"{parameter}={value!r}" for parameter, value in macro.parameters.items()
+        )
+        self.append_chat(
+            html.escape(
+                f"Saved macro '{macro.name}' ({len(command_list)} commands, "
+                f"parameters: {parameters or 'none'}). Run it from Griptape > Macros."
+            ),
+            "#999999",
+        )
+
+    def stop_response(self):
+        """Cancels the reply in progress and drops any queued messages."""
+        dropped = self.request_queue.cancel()
+        if self.request_queue.cancel_event.is_set() and self.response_active:
+            # The reply ends on screen now; the agent run ends at its next chunk
+            self.stream_buffer.push_event("\n\n*Stopped.*")
+            self.stream_buffer.close()
+            self.flush_stream()
+        if dropped:
+            self.append_chat(f"Dropped {dropped} queued message(s).", "#999999")
+        self.update_queue_status()
+
+    def update_queue_status(self):
+        """Shows how many messages are waiting and for how long (main thread)."""
+        queue = self.request_queue
+        self.stop_button.setEnabled(queue.busy or queue.depth > 0)
+        if not queue.busy and not queue.depth:
+            self.status_label.setText("")
+            self.status_timer.stop()
+            return
+
+        status = "Stopping..." if queue.cancel_event.is_set() else "Working..."
+        if self.command_progress:
+            done, total = self.command_progress
+            status += f"  Running commands {done}/{total}"
+        if queue.depth:
+            status += (
+                f"  {queue.depth} queued, oldest waiting "
+                f"{queue.oldest_wait_time():.1f}s"
             )
+        self.status_label.setText(status)
+
+    def show_command_progress(self, done, total):
+        """Called by MayaTool on the main thread as sliced commands run."""
+        self.command_progress = (done, total) if done < total else None
+        self.update_queue_status()
+
+    def push_command_event(self, event):
+        """Queues a MayaTool progress line into the reply (any thread).
+
+        It goes through the stream buffer like reply tokens, so it never waits
+        on the main thread and shows up with the next flush.
+        """
+        self.stream_buffer.push_event(format_command_event(event))
+
+    def append_to_last_chat(self, text):
+        """Appends streamed Markdown to the last Assistant message.
+
+        Finished blocks are inserted once; only the still-open block at the
+        end of the message is replaced.
+        """
+        finished, open_html = self.markdown_renderer.feed(text)
+        self.replace_open_block(finished, open_html)
+
+    def finish_last_chat(self):
+        """Renders whatever is left of the last Assistant message as final."""
+        self.replace_open_block(self.markdown_renderer.finish(), "")
+
+    def replace_open_block(self, finished, open_html):
+        self.transcript.set_open_block(
+            [self.assistant_html(block_html) for block_html in finished],
+            self.assistant_html(open_html) if open_html else "",
+        )
 
-            for chunk in Stream(self.agent).run(message):
-                if chunk and chunk.value:
-                    maya.utils.executeInMainThreadWithResult(
-                        self.append_to_last_chat, chunk.value
-                    )
-            maya.utils.executeInMainThreadWithResult(self.append_to_last_chat, "\n")
+    def assistant_html(self, block_html):
+        return f'<div style="color: #87CEFA;">{block_html}</div>'
+
+    def set_flush_interval(self, interval_ms):
+        """Change how often streamed tokens are written to the chat history."""
+        self.flush_timer.setInterval(interval_ms)
+
+    def sync_conversation(self):
+        """Switches to the current scene's conversation if the scene changed."""
+        path = get_conversation_path(
+            cmds.file(q=True, sceneName=True), get_conversations_dir()
+        )
+        if path == self.conversation_path:
+            return
+
+        self.conversation_path = path
+        # The old scene's turns (and its spilled blocks) go; paging older turns
+        # starts again from the new memory's driver
+        self.transcript.clear()
+        memory = create_conversation_memory(path, load_last_n=self.load_last_n)
+        self.agent.conversation_memory = memory
+        if memory.runs:
+            self.append_chat("Resuming conversation for this scene.", "#999999")
+            for run in memory.runs:
+                for block_html in self.run_blocks(run):
+                    self.transcript.append_block(block_html)
+
+    def load_earlier_turns(self):
+        """Pages older turns of this scene's conversation into the top of the chat."""
+        driver = self.agent.conversation_memory.conversation_memory_driver
+        if not driver.has_older():
+            return
+        blocks = [
+            block_html
+            for run in driver.load_older()
+            for block_html in self.run_blocks(run)
+        ]
+        self.chat_history.insert_at_top(lambda: self.transcript.prepend_blocks(blocks))
+
+    def run_blocks(self, run):
+        """Renders a stored conversation turn as transcript blocks."""
+        return [
+            self.message_html(f"You: {html.escape(run.input.value)}", "#FFD700"),
+            self.message_html("Assistant:", "#87CEFA"),
+            *[self.assistant_html(block) for block in render_blocks(run.output.value)],
+        ]
+
+    def begin_response(self, message):
+        """Starts a new Assistant message and the flush timer (main thread).
+
+        Whatever the timer hasn't flushed of the previous reply is written
+        and that reply finished first, so its tail isn't lost.
+        """
+        if self.response_active:
+            self.stream_buffer.close()
+            self.flush_stream()
+        self.sync_conversation()
+        self.command_progress = None
+        self.append_chat(f"You: {html.escape(message)}", "#FFD700")
+        self.append_chat("Assistant:", "#87CEFA")
+        self.markdown_renderer.reset()
+        self.stream_buffer.open()
+        self.response_active = True
+        if self.coalesce:
+            self.flush_timer.start()
+
+    def flush_stream(self):
+        """Writes all queued tokens with a single cursor insert (main thread)."""
+        text = self.stream_buffer.drain()
+        if text:
+            self.append_to_last_chat(text)
+        if self.stream_buffer.finished and self.response_active:
+            self.response_active = False
+            self.flush_timer.stop()
+            self.finish_last_chat()
+            print(self.stream_buffer.report(coalesced=self.coalesce))
+
+    def generate_response(self, request, cancel_event):
+        """Runs one queued request on the worker thread."""
+        message = request.message
+        start = time.perf_counter()
+        try:
+            maya.utils.executeInMainThreadWithResult(self.begin_response, message)
+
+            key = None
+            if self.response_cache is not None and not request.bypass_cache:
+                conversation = conversation_digest(self.agent.conversation_memory.runs)
+                key = maya.utils.executeInMainThreadWithResult(
+                    self.response_cache_key, message, conversation
+                )
+                entry = self.response_cache.get(key)
+                if entry is not None:
+                    self.answer_from_cache(message, entry)
+                    return
+
+            answer = []
+            edits = self.maya_tool.edit_count
+            with self.cancel_listener(cancel_event):
+                for chunk in Stream(self.agent).run(message):
+                    # After a cancel the run ends at its next prompt or chunk;
+                    # the stream is read to its end so the run has finished
+                    # before the next request touches the agent's memory
+                    if cancel_event.is_set():
+                        continue
+                    if chunk and chunk.value:
+                        answer.append(chunk.value)
+                        self.stream_buffer.push(chunk.value)
+                        if not self.coalesce:
+                            maya.utils.executeInMainThreadWithResult(self.flush_stream)
+            # After Stop the buffer is closed and this is dropped
+            self.stream_buffer.push("\n")
+
+            # Only answers from runs that changed nothing in the scene are reused
+            if (
+                key is not None
+                and not cancel_event.is_set()
+                and self.maya_tool.edit_count == edits
+            ):
+                after = maya.utils.executeInMainThreadWithResult(
+                    self.response_cache_key, message, conversation
+                )
+                if after == key and answer:
+                    seconds = time.perf_counter() - start
+                    self.response_cache.put(key, message, "".join(answer), seconds)
 
         except Exception as e:
             cmds.warning(f"Error generating response: {str(e)}")
+        finally:
+            self.stream_buffer.close()
+            if not self.coalesce:
+                maya.utils.executeInMainThreadWithResult(self.flush_stream)
+
+    def cancel_listener(self, cancel_event):
+        """An event listener that ends the agent run once `cancel_event` is set.
+
+        It raises RequestCancelled on the run's thread from the next prompt
+        or streamed chunk, which stops the stream being read and fails the
+        task, so no more LLM round-trips are made. The turn stays in the
+        conversation with "Stopped by the user" as its answer.
+        """
+
+        def on_event(event):
+            if cancel_event.is_set():
+                raise RequestCancelled("Stopped by the user")
+            return event
+
+        return EventListener(
+            on_event, event_types=[StartPromptEvent, TextChunkEvent, ActionChunkEvent]
+        )
+
+    def response_cache_key(self, message, conversation):
+        """Cache key for a message in the current scene state (main thread).
+
+        `conversation` is the conversation_digest from before the message.
+        """
+        model = getattr(self.agent.prompt_driver, "model", None)
+        return cache_key(
+            message, scene_fingerprint(), model=model, conversation=conversation
+        )
+
+    def answer_from_cache(self, message, entry):
+        """Replays a cached answer and adds the turn to the conversation."""
+        self.stream_buffer.push(entry["answer"] + "\n")
+        self.stream_buffer.push_event(
+            f"\n*Cached answer, saved {entry['seconds']:.1f}s. "
+            "Ctrl+Enter asks again.*\n"
+        )
+        self.agent.conversation_memory.add_run(
+            Run(input=TextArtifact(message), output=TextArtifact(entry["answer"]))
+        )
+        print(self.response_cache.report())
 
     def update_chat(self, text):
         self.append_chat(text, "#FFFFFF")
 
-    def append_chat(self, text, color, newline=True):
-        """Appends a new message to the chat with optional newline formatting."""
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(QTextCursor.End)
+    def append_chat(self, text, color):
+        """Appends a new message line to the chat."""
+        self.transcript.append_block(self.message_html(text, color))
+
+    def message_html(self, text, color):
+        return f'<span style="color: {color};">{text}</span>'
+
+
+def format_command_event(event):
+    """Renders a MayaTool command event as a Markdown line for the reply."""
+    kind = event["event"]
+    if kind == "start":
+        return f"\n\n*Running {event['total']} commands ({event['mode']})...*\n\n"
+    if kind == "end":
+        return f"\n*Commands {event['status']} after {event['elapsed']:.2f}s.*\n\n"
+    source = event["source"].splitlines()[0] if event["source"] else ""
+    if len(source) > COMMAND_SOURCE_LENGTH:
+        source = source[: COMMAND_SOURCE_LENGTH - 3] + "..."
+    return (
+        f"- `{event['index']}/{event['total']}` {event['elapsed']:.2f}s "
+        f"{inline_code(source)} → {inline_code(event['result'])}\n"
+    )
 
-        if newline:
-            text = f"<br>{text}"  # Adds a line break before the new message
 
-        cursor.insertHtml(f'<span style="color: {color};">{text}</span>')
-        self.chat_history.setTextCursor(cursor)
-        self.chat_history.verticalScrollBar().setValue(
-            self.chat_history.verticalScrollBar().maximum()
-        )
+def inline_code(text):
+    return "`" + text.replace("`", "'") + "`"
+
+
+def get_conversations_dir():
+    """Returns the folder holding the per-scene conversation logs."""
+    return os.path.join(cmds.internalVar(userAppDir=True), "griptape", "conversations")
+
+
+def get_response_cache_dir():
+    """Returns the folder holding cached answers to earlier prompts."""
+    return os.path.join(cmds.internalVar(userAppDir=True), "griptape", "response_cache")
+
+
+def get_transcript_spill_path():
+    """Returns a per-session file for transcript blocks that no longer fit in memory."""
+    return os.path.join(
+        cmds.internalVar(userAppDir=True),
+        "griptape",
+        "transcripts",
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl",
+    )
 
 
 def get_maya_main_window():
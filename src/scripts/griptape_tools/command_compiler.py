@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from types import CodeType
+
+from attr import define
+
+# Number of compiled command lists kept around; agents re-issue the same
+# query commands a lot, so even a small cache gets plenty of hits
+CACHE_SIZE = 128
+SCRIPT_FILENAME = "<MayaTool>"
+# Name of the recording function injected into the script's namespace
+RECORD_NAME = "_mayatool_record"
+
+# Names MayaTool puts in the script's namespace that lead into Maya
+MAYA_NAMES = ("maya", "cmds")
+# Top-level packages whose functions must run on Maya's main thread
+MAYA_PACKAGES = ("maya", "pymel", "mtoa", "ufe")
+# Modules whose commands return plain Python data rather than live Maya objects
+PLAIN_RESULT_MODULES = ("maya.cmds", "maya.mel")
+# Builtins that run code the analysis can't see
+OPAQUE_BUILTINS = ("exec", "eval", "compile", "__import__", "globals", "locals", "vars")
+
+
+def build_script(command_list: list[str]) -> str:
+    """Joins the agent's command list into the source of a single script."""
+    return "\n".join(command_list) + "\n"
+
+
+class ResultRecorder(ast.NodeTransformer):
+    """Wraps every top-level expression and assignment value in a record call.
+
+    `x = cmds.ls()` becomes `x = _mayatool_record(0, cmds.ls())`, with the
+    statement's index in the module, so the value is captured whatever the
+    statement looks like, including `maya.cmds` calls, statements that span
+    several lines and several statements on one line. Statements nested
+    inside loops, functions etc. are left alone.
+    """
+
+    def visit_Module(self, node):
+        body = []
+        for index, statement in enumerate(node.body):
+            if isinstance(statement, ast.Expr):
+                statement.value = self._record(index, statement.value)
+            elif isinstance(statement, (ast.Assign, ast.AnnAssign)) and statement.value:
+                statement.value = self._record(index, statement.value)
+            elif isinstance(statement, ast.AugAssign) and isinstance(
+                statement.target, ast.Name
+            ):
+                # Record the updated value rather than the increment
+                body.append(statement)
+                name = ast.copy_location(
+                    ast.Name(id=statement.target.id, ctx=ast.Load()), statement
+                )
+                statement = ast.copy_location(
+                    ast.Expr(value=self._record(index, name)), statement
+                )
+            body.append(statement)
+        node.body = body
+        return ast.fix_missing_locations(node)
+
+    def _record(self, index, value):
+        call = ast.Call(
+            func=ast.Name(id=RECORD_NAME, ctx=ast.Load()),
+            args=[ast.Constant(value=index), value],
+            keywords=[],
+        )
+        return ast.copy_location(call, value)
+
+
+def _bound_names(statement):
+    """Names a statement binds anywhere inside it, including nested scopes."""
+    names = set()
+    for node in ast.walk(statement):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.alias):
+            names.add((node.asname or node.name).split(".")[0])
+    return names
+
+
+def _imported_modules(statement):
+    """(bound name, module) for every import inside a statement."""
+    for node in ast.walk(statement):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    yield alias.asname, alias.name
+                else:
+                    root = alias.name.split(".")[0]
+                    yield root, root
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            for alias in node.names:
+                yield alias.asname or alias.name, f"{node.module}.{alias.name}"
+
+
+def _calls_plain_module(value, plain_names):
+    """True for `cmds.ls(...)`-style calls, which return plain Python data."""
+    if (
+        isinstance(value, ast.Call)
+        and isinstance(value.func, ast.Name)
+        and value.func.id == RECORD_NAME
+    ):
+        value = value.args[1]
+    return (
+        isinstance(value, ast.Call)
+        and isinstance(value.func, ast.Attribute)
+        and isinstance(value.func.value, ast.Name)
+        and value.func.value.id in plain_names
+    )
+
+
+def find_maya_statements(statements) -> tuple:
+    """Flags the top-level statements that have to run on Maya's main thread.
+
+    A statement touches Maya if it uses `maya`/`cmds`, imports a Maya
+    package, calls something the analysis can't follow (exec, eval, ...) or
+    uses a tainted name. Tainted names are bound by statements that touch
+    Maya: functions and classes that use Maya, Maya module aliases and
+    variables that may hold live Maya objects. Variables assigned straight
+    from a `cmds.*(...)` call hold plain data and stay untainted. Functions
+    can use names bound later in the script, so passes repeat until the
+    tainted set stops growing.
+    """
+    tainted = set(MAYA_NAMES) | set(OPAQUE_BUILTINS)
+    plain = {"cmds"}
+    while True:
+        size = len(tainted)
+        flags = []
+        for statement in statements:
+            loaded = {
+                node.id
+                for node in ast.walk(statement)
+                if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+            }
+            touches = bool(loaded & tainted)
+            for name, module in _imported_modules(statement):
+                if module.split(".")[0] in MAYA_PACKAGES:
+                    touches = True
+                    tainted.add(name)
+                    if module in PLAIN_RESULT_MODULES:
+                        plain.add(name)
+            if touches:
+                value = getattr(statement, "value", None)
+                if not (
+                    isinstance(statement, (ast.Assign, ast.AnnAssign))
+                    and _calls_plain_module(value, plain)
+                ):
+                    tainted |= _bound_names(statement)
+            flags.append(touches)
+        if len(tainted) == size:
+            return tuple(flags)
+
+
+@define(frozen=True)
+class CompiledScript:
+    """A command list compiled once, with the source of each statement."""
+
+    code: CodeType
+    # (first line, source text) of each top-level statement, in order
+    sources: tuple
+    # (line, code) per top-level statement, for running the script in slices
+    slices: tuple = ()
+    # Whether each slice has to run on Maya's main thread
+    maya_slices: tuple = ()
+
+    def segments(self):
+        """Groups consecutive slices by thread, as (on_main_thread, codes) pairs."""
+        flags = self.maya_slices or (True,) * len(self.slices)
+        pairs = zip(flags, (code for _, code in self.slices))
+        return [
+            (on_main, [code for _, code in group])
+            for on_main, group in itertools.groupby(pairs, key=lambda pair: pair[0])
+        ]
+
+    def create_namespace(self, on_record=None, **names) -> tuple[dict, list]:
+        """Returns globals for running the script and the list results go into.
+
+        `on_record(index, result)` is called with each result as it is
+        recorded, with the index of its statement in `sources`.
+        """
+        results = []
+
+        def record(index, value):
+            line, source = self.sources[index]
+            result = {"line": line, "source": source, "value": value}
+            results.append(result)
+            if on_record is not None:
+                on_record(index, result)
+            return value
+
+        return {RECORD_NAME: record, **names}, results
+
+
+def command_list_key(command_list: list[str]) -> str:
+    return hashlib.sha1(json.dumps(command_list).encode("utf-8")).hexdigest()
+
+
+class CompiledScriptCache:
+    """Thread-safe LRU cache of compiled command lists, keyed by a content hash."""
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+script_cache = CompiledScriptCache()
+
+
+def compile_commands(command_list: list[str]) -> CompiledScript:
+    """Returns the compiled script for a command list, building it only once.
+
+    Raises SyntaxError if the commands aren't valid Python.
+    """
+    key = command_list_key(command_list)
+    script = script_cache.get(key)
+    if script is None:
+        source = build_script(command_list)
+        tree = ast.parse(source, SCRIPT_FILENAME)
+        sources = tuple(
+            (statement.lineno, ast.get_source_segment(source, statement))
+            for statement in tree.body
+        )
+        tree = ResultRecorder().visit(tree)
+        slices = tuple(
+            (
+                statement.lineno,
+                compile(
+                    ast.Module(body=[statement], type_ignores=[]),
+                    SCRIPT_FILENAME,
+                    "exec",
+                ),
+            )
+            for statement in tree.body
+        )
+        script = CompiledScript(
+            code=compile(tree, SCRIPT_FILENAME, "exec"),
+            sources=sources,
+            slices=slices,
+            maya_slices=find_maya_statements(tree.body),
+        )
+        script_cache.put(key, script)
+    return script
+
+
+def format_syntax_error(error: SyntaxError) -> str:
+    """Describes a syntax error in terms the agent can act on."""
+    message = f"Syntax error on line {error.lineno}: {error.msg}"
+    if error.text:
+        message += f"\n    {error.text.rstrip()}"
+    return message
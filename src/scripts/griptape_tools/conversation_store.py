@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from typing import Any
+
+from attr import define, field
+from griptape.drivers.memory.conversation import BaseConversationMemoryDriver
+from griptape.memory.structure import ConversationMemory, Run
+
+# Number of turns loaded into the prompt when a conversation is opened
+LOAD_LAST_N = 20
+# Number of older turns read per page when the user scrolls back
+PAGE_SIZE = 10
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@define(kw_only=True)
+class JsonlConversationMemoryDriver(BaseConversationMemoryDriver):
+    """Append-only conversation log with one JSON record per line.
+
+    `store` only appends runs that aren't in the file yet, and `load` reads
+    just the last `load_last_n` runs from the end of the file, so opening a
+    long conversation costs the same as opening a short one. Older runs can
+    be paged in with `load_older`.
+    """
+
+    persist_file: str = field(metadata={"serializable": True})
+    load_last_n: int = field(default=LOAD_LAST_N, metadata={"serializable": True})
+    _stored_ids: set = field(factory=set, init=False)
+    _stored_meta: dict = field(factory=dict, init=False)
+    # Byte offset of the oldest run handed out so far
+    _page_offset: int | None = field(default=None, init=False)
+
+    def store(self, runs: list[Run], metadata: dict[str, Any]) -> None:
+        lines = [
+            json.dumps({"run": run.to_dict()})
+            for run in runs
+            if run.id not in self._stored_ids
+        ]
+        if metadata and metadata != self._stored_meta:
+            lines.append(json.dumps({"meta": metadata}))
+            self._stored_meta = dict(metadata)
+        if lines:
+            os.makedirs(os.path.dirname(self.persist_file), exist_ok=True)
+            with open(self.persist_file, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        # Runs trimmed from memory never come back, so only track current ones
+        self._stored_ids = {run.id for run in runs}
+
+    def load(self) -> tuple[list[Run], dict[str, Any]]:
+        if not os.path.exists(self.persist_file):
+            self._page_offset = 0
+            return [], {}
+
+        end = os.path.getsize(self.persist_file)
+        records, self._page_offset = self._read_records_before(end, self.load_last_n)
+        runs = [Run.from_dict(record["run"]) for record in records if "run" in record]
+        metadata = {}
+        for record in records:
+            metadata.update(record.get("meta", {}))
+        self._stored_ids = {run.id for run in runs}
+        self._stored_meta = dict(metadata)
+        return runs, metadata
+
+    def has_older(self) -> bool:
+        return bool(self._page_offset)
+
+    def load_older(self, count: int = PAGE_SIZE) -> list[Run]:
+        """Returns up to `count` runs older than anything loaded so far, oldest first."""
+        if not self._page_offset:
+            return []
+        records, self._page_offset = self._read_records_before(self._page_offset, count)
+        return [Run.from_dict(record["run"]) for record in records if "run" in record]
+
+    def _read_records_before(self, end: int, count: int) -> tuple[list[dict], int]:
+        """Reads backwards from `end` until `count` run records have been found.
+
+        Returns the records in file order and the byte offset of the first one.
+        """
+        records = []
+        run_count = 0
+        first_offset = end
+        position = end
+        remainder = b""
+        with open(self.persist_file, "rb") as f:
+            while position > 0 and run_count < count:
+                size = min(READ_CHUNK_SIZE, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + remainder).split(b"\n")
+                offset = position
+                # Unless we're at the start, the first piece may be a partial
+                # line; carry it over to the next (earlier) read
+                if position > 0:
+                    remainder = lines.pop(0)
+                    offset += len(remainder) + 1
+                starts = []
+                for line in lines:
+                    starts.append(offset)
+                    offset += len(line) + 1
+                for start, line in zip(reversed(starts), reversed(lines)):
+                    if run_count >= count:
+                        break
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    records.append(record)
+                    run_count += "run" in record
+                    first_offset = start
+        records.reverse()
+        return records, first_offset
+
+
+def get_conversation_path(scene_name, root):
+    """Returns the conversation log for a scene file (or untitled scenes)."""
+    scene_name = scene_name or "untitled"
+    digest = hashlib.sha1(os.path.normcase(scene_name).encode("utf-8")).hexdigest()
+    stem = re.sub(r"[^\w.-]", "_", os.path.splitext(os.path.basename(scene_name))[0])
+    return os.path.join(root, f"{stem}-{digest[:10]}.jsonl")
+
+
+def create_conversation_memory(persist_file, load_last_n=LOAD_LAST_N):
+    """Conversation memory backed by an append-only log, capped at `load_last_n` runs."""
+    return ConversationMemory(
+        conversation_memory_driver=JsonlConversationMemoryDriver(
+            persist_file=persist_file, load_last_n=load_last_n
+        ),
+        max_runs=load_last_n,
+    )
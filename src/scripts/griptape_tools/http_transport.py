@@ -0,0 +1,293 @@
+import email.utils
+import importlib.util
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+import httpx
+
+# Sustained requests per second to one host, and how many may go at once
+REQUESTS_PER_SECOND = 2.0
+BURST = 10
+# (requests per second, burst) for each provider's host, around their entry
+# tier limits; rate limit headers tighten them further. None means the host
+# isn't paced, e.g. a local Ollama. Other hosts get the defaults above.
+HOST_LIMITS = {
+    "api.openai.com": (8.0, 20),
+    "api.anthropic.com": (0.8, 5),
+    "localhost": None,
+    "127.0.0.1": None,
+    "::1": None,
+}
+# Connection pool; idle connections stay open between chat messages
+MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 60.0
+# Use HTTP/2 when the h2 package is installed
+USE_HTTP2 = True
+# Statuses worth retrying: rate limited, server error, overloaded or a bad gateway
+RETRY_STATUSES = (429, 500, 502, 503, 504, 529)
+MAX_RETRIES = 5
+# Attempts left to the prompt driver itself, for failures the transport can't
+# retry because the response had already started streaming
+DRIVER_ATTEMPTS = 2
+# Exponential backoff when the response doesn't say how long to wait
+BACKOFF_SECONDS = 1.0
+MAX_WAIT_SECONDS = 60.0
+# Default client timeouts, matching the OpenAI SDK
+TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+# Rate limit headers: remaining budget and when it resets
+RATE_LIMIT_HEADERS = (
+    ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),  # OpenAI
+    ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+    ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+    ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+)
+DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_wait(value):
+    """Seconds until `value`, which is a number of seconds, a duration like
+    "6m0s" or "20ms", an RFC 3339 timestamp or an HTTP date. None if unknown."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class TokenBucket:
+    """Request budget for one host.
+
+    Tokens refill at `rate` per second up to `capacity`, and each request
+    takes one. Rate limit headers can shrink the budget or pause the host
+    entirely, which holds back every session sending to it.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+            wait = min(wait, MAX_WAIT_SECONDS)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        with self.lock:
+            until = time.monotonic() + min(seconds, MAX_WAIT_SECONDS)
+            self.paused_until = max(self.paused_until, until)
+
+    def limit(self, remaining):
+        """Caps the budget at what the provider says is left."""
+        with self.lock:
+            self.tokens = min(self.tokens, remaining)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """A pooled httpx transport that paces and retries requests per host.
+
+    Every client built on it shares one connection pool, so sessions reuse
+    open TLS connections, and one token bucket per host, sized from
+    `host_limits`. Rate limit headers adjust the buckets; a 429, server
+    error or overload response pauses the host for its Retry-After (or an
+    exponential backoff) and is retried here, as are timeouts and dropped
+    connections, so callers only see the final response or error.
+    """
+
+    def __init__(self, transport=None, max_retries=MAX_RETRIES, host_limits=None):
+        if transport is None:
+            http2 = USE_HTTP2 and importlib.util.find_spec("h2") is not None
+            transport = httpx.HTTPTransport(
+                http2=http2,
+                retries=2,  # connection failures only; the request wasn't sent
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+        self.transport = transport
+        self.max_retries = max_retries
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.buckets = {}
+        self.retries = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        """Returns the host's token bucket, or None if it isn't paced."""
+        with self._lock:
+            if host not in self.buckets:
+                limits = self.host_limits.get(host, (REQUESTS_PER_SECOND, BURST))
+                self.buckets[host] = TokenBucket(*limits) if limits else None
+            return self.buckets[host]
+
+    def set_limits(self, host, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        """Changes how fast requests go to `host`; rate None stops pacing it."""
+        with self._lock:
+            self.host_limits[host] = (rate, capacity) if rate else None
+            self.buckets.pop(host, None)
+
+    def handle_request(self, request):
+        host = request.url.host
+        bucket = self.bucket(host)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                self.waited += bucket.acquire()
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:  # timeouts, resets, refused
+                if attempt >= self.max_retries:
+                    raise
+                reason, wait = type(e).__name__, None
+            else:
+                wait = self.apply_headers(bucket, response)
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                response.close()
+                reason = f"returned {response.status_code}"
+
+            if wait is None:
+                wait = BACKOFF_SECONDS * 2**attempt * random.uniform(0.5, 1.0)
+            if bucket is not None:
+                bucket.pause(wait)
+            else:
+                time.sleep(min(wait, MAX_WAIT_SECONDS))
+            attempt += 1
+            self.retries += 1
+            print(
+                f"[Griptape] {host} {reason}, retrying in {wait:.1f}s "
+                f"({attempt}/{self.max_retries})"
+            )
+
+    def apply_headers(self, bucket, response):
+        """Updates the bucket (if the host is paced) from the response's rate
+        limit headers.
+
+        Returns the seconds to wait before retrying, if the response says.
+        """
+        headers = response.headers
+        for remaining_header, reset_header in RATE_LIMIT_HEADERS:
+            if bucket is None:  # not paced
+                break
+            try:
+                remaining = int(headers[remaining_header])
+            except (KeyError, ValueError):
+                continue
+            if "requests" in remaining_header:
+                bucket.limit(remaining)
+            if remaining <= 0:
+                reset = parse_wait(headers.get(reset_header))
+                if reset:
+                    bucket.pause(reset)
+
+        if "retry-after-ms" in headers:
+            wait = parse_wait(headers["retry-after-ms"])
+            return wait / 1000 if wait is not None else None
+        return parse_wait(headers.get("retry-after"))
+
+    def close(self):
+        self.transport.close()
+
+
+_transport = None
+_client = None
+_lock = threading.Lock()
+
+
+def get_transport():
+    """Returns the process-wide transport."""
+    global _transport
+    with _lock:
+        if _transport is None:
+            _transport = RateLimitedTransport()
+        return _transport
+
+
+def get_http_client():
+    """Returns the process-wide httpx client on the shared transport."""
+    global _client
+    transport = get_transport()
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(
+                transport=transport, timeout=TIMEOUT, follow_redirects=True
+            )
+        return _client
+
+
+def use_shared_transport(driver):
+    """Gives a Griptape prompt driver a client on the shared transport.
+
+    Handles the OpenAI, Anthropic and Ollama drivers; other drivers, and
+    drivers that already have a client, are returned unchanged. Retries are
+    left to the transport, so the SDK's are turned off and the driver's cut
+    to DRIVER_ATTEMPTS, for failures once a response is streaming.
+    """
+    if getattr(driver, "_client", True) is not None:
+        return driver
+    name = type(driver).__name__
+    if name == "OpenAiChatPromptDriver":
+        import openai
+
+        driver.client = openai.OpenAI(
+            base_url=driver.base_url,
+            api_key=driver.api_key,
+            organization=driver.organization,
+            http_client=get_http_client(),
+            max_retries=0,
+        )
+    elif name == "AnthropicPromptDriver":
+        import anthropic
+
+        driver.client = anthropic.Anthropic(
+            api_key=driver.api_key, http_client=get_http_client(), max_retries=0
+        )
+    elif name == "OllamaPromptDriver":
+        import ollama
+
+        # Ollama builds its own httpx client; the transport is what's shared
+        driver.client = ollama.Client(host=driver.host, transport=get_transport())
+    else:
+        return driver
+    driver.max_attempts = DRIVER_ATTEMPTS
+    return driver
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import threading
+
+import maya.cmds as cmds
+import maya.utils
+
+# Modules the menu imports on first click; the report shows what each costs
+MENU_MODULES = ("griptape_tools.chatbot", "griptape_tools.api_keys")
+# Rows shown in each table of the report
+REPORT_ROWS = 15
+WINDOW = "GriptapeImportReport"
+
+
+def measure_imports(modules=MENU_MODULES, mayapy=None):
+    """Imports `modules` in a fresh mayapy with -X importtime.
+
+    Returns (timings, errors): timings are (module, self_us, cumulative_us)
+    in import order, errors is the process's other stderr output. A
+    fresh process gives cold-start numbers even if the modules are already
+    loaded here.
+    """
+    from .scene_inspector import find_mayapy
+
+    scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [scripts_dir, env.get("PYTHONPATH")])
+    )
+    code = "; ".join(f"import {module}" for module in modules)
+    process = subprocess.run(
+        [mayapy or find_mayapy(), "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+    timings, errors = [], []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            if line.strip():
+                errors.append(line)
+            continue
+        if "imported package" in line:  # the column header
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        timings.append((name.strip(), int(own), int(cumulative)))
+    return timings, errors
+
+
+def format_report(
+    timings, errors=(), click_timings=None, modules=MENU_MODULES, rows=REPORT_ROWS
+):
+    """Lays out the import timings as plain-text tables."""
+    lines = []
+    if click_timings:
+        lines.append("Menu imports this session (first click):")
+        for module, seconds in click_timings.items():
+            lines.append(f"  {seconds * 1000:9.1f} ms  {module}")
+        lines.append("")
+
+    total = sum(own for _, own, _ in timings)
+    lines.append(f"Cold import of {', '.join(modules)}: {total / 1000:.1f} ms")
+    lines.append("")
+
+    packages = {}
+    for name, own, _ in timings:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + own
+    lines.append("By top-level package (self time):")
+    for root, own in sorted(packages.items(), key=lambda item: -item[1])[:rows]:
+        lines.append(f"  {own / 1000:9.1f} ms  {root}")
+    lines.append("")
+
+    lines.append("Slowest modules (self time, cumulative):")
+    for name, own, cumulative in sorted(timings, key=lambda t: -t[1])[:rows]:
+        lines.append(f"  {own / 1000:9.1f} ms  {cumulative / 1000:9.1f} ms  {name}")
+
+    if errors:
+        lines.append("")
+        lines.append("Errors:")
+        lines.extend(f"  {line}" for line in errors[-rows:])
+    return "\n".join(lines)
+
+
+def show_import_report(*args):
+    """Measures import times in the background and shows them in a window."""
+    from .menu import import_timings
+
+    cmds.warning("Measuring Griptape import times...")
+
+    def measure():
+        try:
+            timings, errors = measure_imports()
+            report = format_report(timings, errors, click_timings=import_timings)
+        except Exception as e:
+            report = f"Could not measure import times: {e}"
+        maya.utils.executeDeferred(show_report_window, report)
+
+    threading.Thread(target=measure, daemon=True).start()
+
+
+def show_report_window(report):
+    print(report)
+    if cmds.window(WINDOW, exists=True):
+        cmds.deleteUI(WINDOW)
+    cmds.window(WINDOW, title="Griptape Import Times", widthHeight=(640, 480))
+    cmds.paneLayout()
+    cmds.scrollField(text=report, editable=False, wordWrap=False, font="fixedWidthFont")
+    cmds.showWindow(WINDOW)
@@ -0,0 +1,380 @@
+import ast
+import builtins
+import hashlib
+import importlib.util
+import itertools
+import json
+import keyword
+import marshal
+import os
+import re
+import time
+
+import maya
+import maya.cmds as cmds
+import maya.mel as mel
+from attr import define, field
+
+from .command_compiler import _bound_names, build_script
+from .maya_executor import run_batch
+
+# Names every macro can use: the usual modules and the current selection
+MACRO_NAMES = ("maya", "cmds", "selection")
+# Parameter used for the literal in `range(n)`
+COUNT_PARAMETER = "count"
+OPTIONS_WINDOW = "GriptapeMacroOptions"
+
+
+@define
+class Macro:
+    """A saved command list, replayed without the agent.
+
+    `source` is the command list with its literal settings replaced by
+    parameter names; `parameters` maps each name to its default.
+    """
+
+    name: str
+    source: str
+    parameters: dict = field(factory=dict)
+    commands: list = field(factory=list)
+    code: object = field(default=None, repr=False)
+
+    def compile(self):
+        self.code = compile(self.source, f"<macro {self.name}>", "exec")
+        return self.code
+
+
+class ParameterLifter(ast.NodeTransformer):
+    """Turns numeric keyword arguments and `range(n)` counts into parameters.
+
+    `cmds.polySphere(radius=2.5)` becomes `cmds.polySphere(radius=radius)`
+    with {"radius": 2.5}. Repeated settings with the same value share one
+    parameter; different values get numbered names, as do settings named
+    like a builtin, a keyword or a name the script assigns itself. Strings
+    (node names, types) and flags (booleans) are left alone.
+    """
+
+    def __init__(self, reserved):
+        self.reserved = (
+            set(reserved) | set(MACRO_NAMES) | set(dir(builtins)) | set(keyword.kwlist)
+        )
+        self.parameters = {}
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        for keyword in node.keywords:
+            if keyword.arg:
+                keyword.value = self._lift(keyword.arg, keyword.value)
+        if (
+            isinstance(node.func, ast.Name)
+            and node.func.id == "range"
+            and len(node.args) == 1
+        ):
+            node.args[0] = self._lift(COUNT_PARAMETER, node.args[0])
+        return node
+
+    def _lift(self, name, node):
+        try:
+            value = ast.literal_eval(node)
+        except ValueError:
+            return node
+        if not _is_setting(value):
+            return node
+        if isinstance(value, tuple):
+            value = list(value)
+
+        candidate, number = name, 1
+        while candidate in self.reserved or (
+            candidate in self.parameters and self.parameters[candidate] != value
+        ):
+            number += 1
+            candidate = f"{name}_{number}"
+        self.parameters[candidate] = value
+        return ast.copy_location(ast.Name(id=candidate, ctx=ast.Load()), node)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_setting(value):
+    if _is_number(value):
+        return True
+    return (
+        isinstance(value, (list, tuple))
+        and bool(value)
+        and all(_is_number(v) for v in value)
+    )
+
+
+def make_macro(name, command_list):
+    """Builds a macro from a command list, lifting its settings into parameters.
+
+    Raises SyntaxError if the commands aren't valid Python.
+    """
+    tree = ast.parse(build_script(command_list))
+    reserved = set().union(*(_bound_names(statement) for statement in tree.body))
+    lifter = ParameterLifter(reserved)
+    tree = ast.fix_missing_locations(lifter.visit(tree))
+    macro = Macro(
+        name=name,
+        source=ast.unparse(tree) + "\n",
+        parameters=lifter.parameters,
+        commands=list(command_list),
+    )
+    macro.compile()
+    return macro
+
+
+# Library
+
+
+def get_macro_dir():
+    """Returns the folder holding saved macros."""
+    return os.path.join(cmds.internalVar(userAppDir=True), "griptape", "macros")
+
+
+def macro_file_name(name):
+    return re.sub(r"\W+", "_", name).strip("_") or "macro"
+
+
+def _stored_name(info_path):
+    """The macro name saved in an info file, or None if there is none."""
+    try:
+        with open(info_path, encoding="utf-8") as f:
+            return json.load(f)["name"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _paths(name):
+    """The info and code files of a macro.
+
+    Names that clean up to the same file name ("My Macro", "my-macro") get
+    numbered files; the name stored in each file says whose it is.
+    """
+    folder = get_macro_dir()
+    stem = macro_file_name(name)
+    # Case-insensitive, like the file systems on Windows and macOS
+    pattern = re.compile(re.escape(stem) + r"(_\d+)?\.json", re.IGNORECASE)
+    taken = set()
+    if os.path.isdir(folder):
+        for file_name in os.listdir(folder):
+            if pattern.fullmatch(file_name):
+                base = os.path.join(folder, file_name[: -len(".json")])
+                if _stored_name(base + ".json") == name:
+                    return base + ".json", base + ".code"
+                taken.add(base.lower())
+    for number in itertools.count(1):
+        base = os.path.join(folder, stem if number == 1 else f"{stem}_{number}")
+        if base.lower() not in taken:
+            return base + ".json", base + ".code"
+
+
+def _code_header(source):
+    # The code only matches the Python it was compiled by, and the source
+    return importlib.util.MAGIC_NUMBER + hashlib.sha1(source.encode()).digest()
+
+
+def save_macro(name, command_list):
+    """Saves a command list as a macro; returns the Macro."""
+    macro = make_macro(name, command_list)
+    info_path, code_path = _paths(name)
+    os.makedirs(os.path.dirname(info_path), exist_ok=True)
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "name": macro.name,
+                "source": macro.source,
+                "parameters": macro.parameters,
+                "commands": macro.commands,
+            },
+            f,
+            indent=2,
+        )
+    _write_code(code_path, macro)
+    _loaded.pop(name, None)
+    return macro
+
+
+def _write_code(path, macro):
+    with open(path, "wb") as f:
+        f.write(_code_header(macro.source) + marshal.dumps(macro.code))
+
+
+def list_macros():
+    """Names of the saved macros, sorted."""
+    folder = get_macro_dir()
+    if not os.path.isdir(folder):
+        return []
+    names = []
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.endswith(".json"):
+            try:
+                with open(os.path.join(folder, file_name), encoding="utf-8") as f:
+                    names.append(json.load(f)["name"])
+            except (OSError, ValueError, KeyError):
+                continue
+    return sorted(names)
+
+
+# Macros already read from disk, by name: (info file, modification time, Macro)
+_loaded = {}
+
+
+def load_macro(name):
+    """Reads a macro, using its precompiled code when it is still valid."""
+    cached = _loaded.get(name)
+    if cached is not None:
+        info_path, modified, macro = cached
+        try:
+            if os.path.getmtime(info_path) == modified:
+                return macro
+        except OSError:
+            pass
+
+    info_path, code_path = _paths(name)
+    modified = os.path.getmtime(info_path)
+
+    with open(info_path, encoding="utf-8") as f:
+        info = json.load(f)
+    macro = Macro(
+        name=info["name"],
+        source=info["source"],
+        parameters=info.get("parameters", {}),
+        commands=info.get("commands", []),
+    )
+    header = _code_header(macro.source)
+    try:
+        with open(code_path, "rb") as f:
+            data = f.read()
+        if data.startswith(header):
+            macro.code = marshal.loads(data[len(header) :])
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+    if macro.code is None:
+        # Edited by hand or saved by another Python version
+        macro.compile()
+        _write_code(code_path, macro)
+    _loaded[name] = (info_path, modified, macro)
+    return macro
+
+
+def delete_macro(name):
+    for path in _paths(name):
+        if os.path.exists(path):
+            os.remove(path)
+    _loaded.pop(name, None)
+
+
+def run_macro(name, values=None, undo=True):
+    """Runs a saved macro as one undo chunk (main thread); returns the seconds.
+
+    `values` is a dict overriding parameter defaults. `selection` holds the
+    long names of the nodes selected when it runs.
+    """
+    macro = load_macro(name)
+    values = values or {}
+    unknown = set(values) - set(macro.parameters)
+    if unknown:
+        raise ValueError(
+            f"Macro '{macro.name}' has no parameters {sorted(unknown)}; "
+            f"it takes {sorted(macro.parameters)}"
+        )
+    namespace = {
+        "maya": maya,
+        "cmds": cmds,
+        "selection": cmds.ls(selection=True, long=True) or [],
+        **macro.parameters,
+        **values,
+    }
+    start = time.perf_counter()
+    run_batch(lambda: exec(macro.code, namespace), undo=undo, chunk_name=macro.name)
+    return time.perf_counter() - start
+
+
+def play_macro(name, values=None):
+    """Runs a macro from the menu or shelf, reporting errors as warnings."""
+    try:
+        seconds = run_macro(name, values)
+    except Exception as e:
+        cmds.warning(f"Macro '{name}' failed: {e}")
+        return
+    print(f"[Griptape] Ran macro '{name}' in {seconds * 1000:.1f} ms")
+
+
+# UI
+
+
+def build_macro_menu(menu, *args):
+    """Fills the Macros submenu; rebuilt every time it opens."""
+    cmds.menu(menu, e=True, deleteAllItems=True)
+    names = list_macros()
+    if not names:
+        cmds.menuItem(label="No macros saved yet", enable=False, parent=menu)
+        return
+    for name in names:
+        cmds.menuItem(
+            label=name, parent=menu, command=lambda *a, name=name: play_macro(name)
+        )
+        cmds.menuItem(
+            optionBox=True,
+            parent=menu,
+            command=lambda *a, name=name: show_macro_options(name),
+        )
+
+
+def show_macro_options(name):
+    """Window for setting a macro's parameters before running it."""
+    macro = load_macro(name)
+    if cmds.window(OPTIONS_WINDOW, exists=True):
+        cmds.deleteUI(OPTIONS_WINDOW)
+    cmds.window(OPTIONS_WINDOW, title=f"Macro: {macro.name}")
+    cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
+
+    fields = {}
+    for parameter, default in macro.parameters.items():
+        if isinstance(default, int):
+            control = cmds.intFieldGrp(label=parameter, value1=default)
+        elif isinstance(default, float):
+            control = cmds.floatFieldGrp(label=parameter, value1=default)
+        else:
+            text = default if isinstance(default, str) else json.dumps(default)
+            control = cmds.textFieldGrp(label=parameter, text=text)
+        fields[parameter] = control
+
+    def run(*args):
+        values = {}
+        for parameter, control in fields.items():
+            default = macro.parameters[parameter]
+            if isinstance(default, int):
+                values[parameter] = cmds.intFieldGrp(control, q=True, value1=True)
+            elif isinstance(default, float):
+                values[parameter] = cmds.floatFieldGrp(control, q=True, value1=True)
+            else:
+                text = cmds.textFieldGrp(control, q=True, text=True)
+                values[parameter] = (
+                    text if isinstance(default, str) else json.loads(text)
+                )
+        play_macro(macro.name, values)
+
+    cmds.rowLayout(numberOfColumns=3)
+    cmds.button(label="Run", command=run)
+    cmds.button(label="Add to Shelf", command=lambda *a: add_shelf_button(name))
+    cmds.button(label="Close", command=lambda *a: cmds.deleteUI(OPTIONS_WINDOW))
+    cmds.showWindow(OPTIONS_WINDOW)
+
+
+def add_shelf_button(name):
+    """Adds a button that plays the macro to the current shelf."""
+    shelf_top = mel.eval("$gtShelfTopLevel = $gShelfTopLevel")
+    shelf = cmds.tabLayout(shelf_top, q=True, selectTab=True)
+    cmds.shelfButton(
+        parent=shelf,
+        label=name,
+        annotation=f"Griptape macro: {name}",
+        image="pythonFamily.png",
+        imageOverlayLabel=name[:6],
+        sourceType="python",
+        command=(f"from griptape_tools.macros import play_macro\nplay_macro({name!r})"),
+    )
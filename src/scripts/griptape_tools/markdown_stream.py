@@ -0,0 +1,153 @@
+import html
+import re
+
+import markdown
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+
+# Long open blocks are cut into finished pieces so a single huge code block,
+# list or paragraph doesn't get re-rendered in full on every chunk.
+MAX_OPEN_LINES = 200
+
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s+")
+HEADING_RE = re.compile(r"^ {0,3}#{1,6}(\s|$)")
+
+
+def render_markdown(text):
+    """Renders a complete Markdown string to HTML."""
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def render_blocks(text):
+    """Renders a complete Markdown string to a list of per-block HTML strings."""
+    renderer = StreamingMarkdownRenderer()
+    finished, _ = renderer.feed(text)
+    return finished + renderer.finish()
+
+
+class StreamingMarkdownRenderer:
+    """Renders a streamed Markdown reply block by block.
+
+    Finished blocks (paragraphs, lists, fenced code, headings) are rendered
+    once and never touched again. Only the block that is still open is
+    re-rendered as new text arrives, so the cost of each chunk depends on the
+    size of the open block rather than the length of the whole reply.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._lines = []  # complete lines of the open block
+        self._partial = ""  # trailing text that has no newline yet
+        self._kind = None  # "paragraph", "list" or "fence"
+        self._fence = None  # opening fence marker while inside a code block
+        self._fence_info = ""
+        self._finished = []
+
+    def feed(self, text):
+        """Adds streamed text.
+
+        Returns a list of HTML strings for blocks that were completed by this
+        text, and the HTML for the block that is still open (may be empty).
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._add_line(line)
+
+        finished, self._finished = self._finished, []
+        return finished, self._render_open()
+
+    def finish(self):
+        """Closes the open block and returns the HTML of everything left over."""
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = ""
+        self._close_block()
+        finished, self._finished = self._finished, []
+        self.reset()
+        return finished
+
+    def _add_line(self, line):
+        if self._kind == "fence":
+            stripped = line.strip()
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._close_block()
+                return
+            self._lines.append(line)
+            if len(self._lines) >= MAX_OPEN_LINES:
+                self._finished.append(self._render_code(self._lines))
+                self._lines = []
+            return
+
+        fence = FENCE_RE.match(line)
+        if fence:
+            self._close_block()
+            self._kind = "fence"
+            self._fence = fence.group(1)
+            self._fence_info = line.strip()[len(self._fence) :].strip()
+            return
+
+        if not line.strip():
+            if self._kind == "list":
+                # A blank line may sit between list items; keep it for now
+                self._lines.append(line)
+            else:
+                self._close_block()
+            return
+
+        if HEADING_RE.match(line):
+            self._close_block()
+            self._finished.append(render_markdown(line))
+            return
+
+        is_item = bool(LIST_ITEM_RE.match(line))
+        if self._kind == "list":
+            indented = line.startswith((" ", "\t"))
+            if not (is_item or indented):
+                if self._lines and self._lines[-1].strip():
+                    # Lazy continuation of the last list item
+                    self._lines.append(line)
+                    return
+                self._close_block()
+            elif is_item and len(self._lines) >= MAX_OPEN_LINES:
+                self._close_block()
+        elif is_item:
+            # LLMs often start a list straight after a paragraph line
+            self._close_block()
+        elif self._kind == "paragraph" and len(self._lines) >= MAX_OPEN_LINES:
+            self._close_block()
+
+        if self._kind is None:
+            self._kind = "list" if is_item else "paragraph"
+        self._lines.append(line)
+
+    def _close_block(self):
+        if self._kind == "fence":
+            if self._lines:
+                self._finished.append(self._render_code(self._lines))
+        elif self._lines:
+            self._finished.append(render_markdown("\n".join(self._lines).rstrip()))
+        self._lines = []
+        self._kind = None
+        self._fence = None
+        self._fence_info = ""
+
+    def _render_code(self, lines):
+        language = self._fence_info.split()[0] if self._fence_info else ""
+        css_class = f' class="language-{html.escape(language)}"' if language else ""
+        code = html.escape("\n".join(lines))
+        return f"<pre><code{css_class}>{code}</code></pre>"
+
+    def _render_open(self):
+        if self._kind == "fence":
+            lines = self._lines + ([self._partial] if self._partial else [])
+            return self._render_code(lines) if lines else ""
+
+        lines = self._lines + ([self._partial] if self._partial else [])
+        text = "\n".join(lines).strip("\n")
+        if not text.strip():
+            return ""
+        return render_markdown(text)
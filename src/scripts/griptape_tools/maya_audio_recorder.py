@@ -1,65 +1,210 @@
 import os
 import threading
-import wave
+from concurrent.futures import Future
 
 import maya.cmds as cmds
+import maya.utils
 import numpy as np
 import sounddevice as sd
 
+from .audio_output import AudioOutput
+
 # Settings
 SAMPLE_RATE = 44100  # CD-quality audio
 CHANNELS = 1
 FILENAME = os.path.join(cmds.internalVar(userAppDir=True), "maya_audio_recording.wav")
+# Seconds of audio the ring buffer holds while the writer catches up
+RING_SECONDS = 5
+# How long the writer sleeps when no new audio has arrived
+WRITER_WAIT = 0.05
+
+
+class AudioRecorder:
+    """Records the default input device to a file in the background.
+
+    Audio is captured into a fixed ring buffer and streamed to the file by a
+    writer thread, so memory use doesn't grow with the recording's length.
+    start() and stop() return at once; the Future they return resolves to
+    the file's path once the last block is on disk, and `on_finished(future)`
+    is called then (on the writer thread). Each recorder has its own state,
+    so several can run at the same time.
+
+    `block_callback(block)` sees every captured block on the audio thread;
+    it must copy what it keeps and return quickly. With `path` set to None
+    nothing is written and blocks only go to the callback.
+
+    `output_rate` mixes the file down to mono at that rate as blocks arrive
+    (e.g. SPEECH_RATE for upload), and `file_format` can be "flac" or "opus"
+    when soundfile supports them; see audio_output.
+    """
+
+    def __init__(
+        self,
+        path=FILENAME,
+        sample_rate=SAMPLE_RATE,
+        channels=CHANNELS,
+        ring_seconds=RING_SECONDS,
+        on_finished=None,
+        block_callback=None,
+        output_rate=None,
+        file_format="wav",
+    ):
+        self.path = path
+        self.output_rate = output_rate
+        self.file_format = file_format
+        self.block_callback = block_callback
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.on_finished = on_finished
+        self.ring = None
+        if path is not None:
+            self.ring = np.zeros(
+                (ring_seconds * sample_rate, channels), dtype=np.float32
+            )
+        self.write_position = 0  # total frames captured (audio thread only)
+        self.read_position = 0  # total frames written to disk (writer thread only)
+        self.dropped_frames = 0
+        self.future = None
+        self._stop = threading.Event()
+        self._data_ready = threading.Event()
+        self._capture_done = threading.Event()
+
+    @property
+    def recording(self):
+        return self.future is not None and not self._stop.is_set()
+
+    @property
+    def duration(self):
+        """Seconds of audio captured so far."""
+        return self.write_position / self.sample_rate
 
-# Global Variables
-recording = False
-audio_data = []
+    def start(self):
+        """Starts recording; returns the Future for the finished file."""
+        if self.recording:
+            raise RuntimeError("Already recording")
+        self.write_position = self.read_position = self.dropped_frames = 0
+        self._stop.clear()
+        self._capture_done.clear()
+        self.future = Future()
+        if self.on_finished:
+            self.future.add_done_callback(self.on_finished)
+        if self.path is not None:
+            threading.Thread(target=self._write, daemon=True).start()
+        threading.Thread(target=self._capture, daemon=True).start()
+        return self.future
 
+    def stop(self):
+        """Signals the recording to stop and returns the Future at once."""
+        self._stop.set()
+        return self.future
 
-def callback(indata, frames, time, status):
-    """Callback function to store audio data"""
-    if status:
-        print(status)
-    if recording:
-        audio_data.append(indata.copy())
+    def _callback(self, indata, frames, time, status):
+        if status:
+            print(status)
+        if self._stop.is_set():
+            return
+        if self.block_callback is not None:
+            self.block_callback(indata)
+        if self.path is None:
+            self.write_position += frames
+            return
+
+        capacity = len(self.ring)
+        if self.write_position + frames - self.read_position > capacity:
+            # The writer is a whole buffer behind; drop audio rather than block here
+            self.dropped_frames += frames
+            return
+        start = self.write_position % capacity
+        first = min(frames, capacity - start)
+        self.ring[start : start + first] = indata[:first]
+        self.ring[: frames - first] = indata[first:]
+        self.write_position += frames
+        self._data_ready.set()
+
+    def _capture(self):
+        try:
+            with sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                callback=self._callback,
+            ):
+                self._stop.wait()
+        except Exception as e:
+            if not self.future.done():
+                self.future.set_exception(e)
+        finally:
+            self._stop.set()
+            self._capture_done.set()
+            self._data_ready.set()
+            if self.path is None and not self.future.done():
+                self.future.set_result(None)
+
+    def _write(self):
+        """Streams captured audio from the ring buffer to the output file."""
+        capacity = len(self.ring)
+        try:
+            output = AudioOutput(
+                self.path,
+                self.sample_rate,
+                self.channels,
+                output_rate=self.output_rate,
+                file_format=self.file_format,
+            )
+            try:
+                while True:
+                    self._data_ready.wait(WRITER_WAIT)
+                    self._data_ready.clear()
+                    finished = self._capture_done.is_set()
+                    end = self.write_position
+                    while self.read_position < end:
+                        start = self.read_position % capacity
+                        count = min(end - self.read_position, capacity - start)
+                        output.write(self.ring[start : start + count])
+                        self.read_position += count
+                    if finished:
+                        break
+            finally:
+                output.close()
+        except Exception as e:
+            self._stop.set()
+            if not self.future.done():
+                self.future.set_exception(e)
+            return
+        if not self.future.done():
+            self.future.set_result(self.path)
+
+
+# The recorder behind the menu/shelf commands
+_recorder = None
 
 
 def start_recording():
     """Starts recording audio"""
-    global recording, audio_data
-    if recording:
+    global _recorder
+    if _recorder is not None and _recorder.recording:
         cmds.warning("Already recording!")
         return
-    recording = True
-    audio_data = []
-    threading.Thread(target=record_thread, daemon=True).start()
+    _recorder = AudioRecorder(
+        on_finished=lambda future: maya.utils.executeDeferred(report_saved, future)
+    )
+    _recorder.start()
     cmds.warning("Recording started...")
 
 
-def record_thread():
-    """Recording thread function"""
-    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, callback=callback):
-        while recording:
-            sd.sleep(100)
-
-
 def stop_recording():
-    """Stops recording and saves the audio file"""
-    global recording
-    if not recording:
+    """Stops recording; the file is finished in the background"""
+    if _recorder is None or not _recorder.recording:
         cmds.warning("Not currently recording!")
         return
-    recording = False
+    _recorder.stop()
     cmds.warning("Recording stopped, saving file...")
 
-    # Convert recorded data to a single numpy array
-    audio_np = np.concatenate(audio_data, axis=0)
 
-    # Save as a WAV file
-    with wave.open(FILENAME, "wb") as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)  # 16-bit PCM
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes((audio_np * 32767).astype(np.int16).tobytes())
-
-    cmds.warning(f"Audio saved to: {FILENAME}")
+def report_saved(future):
+    if future.exception():
+        cmds.warning(f"Recording failed: {future.exception()}")
+        return
+    if _recorder is not None and _recorder.dropped_frames:
+        seconds = _recorder.dropped_frames / _recorder.sample_rate
+        cmds.warning(f"Dropped {seconds:.2f}s of audio")
+    cmds.warning(f"Audio saved to: {future.result()}")
@@ -0,0 +1,231 @@
+import threading
+import time
+
+import maya.cmds as cmds
+import maya.utils
+
+# "default": one undo chunk, viewport keeps redrawing
+# "bulk": one undo chunk with viewport refresh suspended
+# "bulk_no_undo": refresh suspended and undo off, for throwaway scratch scenes
+BATCH_MODES = ("default", "bulk", "bulk_no_undo")
+# "sliced": one undo chunk, run a few statements per idle event so Maya stays
+# responsive; can be cancelled between statements
+# "hybrid": one undo chunk, statements that don't touch Maya run on the
+# calling worker thread and only the rest go to the main thread
+EXECUTION_MODES = BATCH_MODES + ("sliced", "hybrid")
+
+# Command lists at least this long run in bulk mode unless a mode is given
+BULK_THRESHOLD = 50
+# ...and at least this long, sliced
+SLICED_THRESHOLD = 200
+# Time each idle event may spend running sliced statements (one 60 fps frame)
+FRAME_BUDGET_MS = 16
+
+
+def choose_mode(command_list, mode=None, interactive=True):
+    """Returns the execution mode for a command list.
+
+    Without an interactive session (mayapy) there are no idle events or UI
+    to keep responsive, so "sliced" and "hybrid" fall back to "bulk".
+    """
+    if mode:
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution mode '{mode}'. Use one of {EXECUTION_MODES}"
+            )
+    elif len(command_list) >= SLICED_THRESHOLD:
+        mode = "sliced"
+    else:
+        mode = "bulk" if len(command_list) >= BULK_THRESHOLD else "default"
+    if not interactive and mode not in BATCH_MODES:
+        mode = "bulk"
+    return mode
+
+
+def run_batch(func, suspend_refresh=False, undo=True, chunk_name="MayaTool"):
+    """Runs `func` as one batch on the main thread and returns its result.
+
+    With `undo` the batch is a single, correctly paired undo chunk; without it
+    undo is switched off for the batch (the undo queue is not flushed).
+    """
+    undo_state = cmds.undoInfo(q=True, stateWithoutFlush=True)
+    if undo:
+        cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    else:
+        cmds.undoInfo(stateWithoutFlush=False)
+    if suspend_refresh:
+        cmds.refresh(suspend=True)
+    try:
+        return func()
+    finally:
+        if suspend_refresh:
+            cmds.refresh(suspend=False)
+            cmds.refresh()
+        if undo:
+            cmds.undoInfo(closeChunk=True)
+        else:
+            cmds.undoInfo(stateWithoutFlush=undo_state)
+
+
+def run_script(script, namespace, mode="default", chunk_name="MayaTool"):
+    """Runs a CompiledScript in one of the BATCH_MODES (main thread)."""
+    if mode not in BATCH_MODES:
+        raise ValueError(f"run_script can't run '{mode}' mode")
+    return run_batch(
+        lambda: exec(script.code, namespace),
+        suspend_refresh=mode != "default",
+        undo=mode != "bulk_no_undo",
+        chunk_name=chunk_name,
+    )
+
+
+class SlicedRun:
+    """Runs a CompiledScript a few statements at a time from Maya idle events.
+
+    Each idle event runs statements until the frame budget is used up (always
+    at least one), so the viewport and UI keep updating in between. The cancel
+    event is checked before every statement and `on_progress(done, total)` is
+    called on the main thread after every slice. All slices form one undo
+    chunk, opened by start() and closed when the run ends; anything the user
+    does in Maya while it runs lands in the same chunk.
+
+    start() must be called on the main thread; wait() on any other thread.
+    """
+
+    def __init__(
+        self,
+        script,
+        namespace,
+        cancel_event=None,
+        on_progress=None,
+        budget_ms=FRAME_BUDGET_MS,
+        chunk_name="MayaTool",
+    ):
+        self.script = script
+        self.namespace = namespace
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_progress = on_progress
+        self.budget = budget_ms / 1000.0
+        self.chunk_name = chunk_name
+        self.position = 0
+        self.cancelled = False
+        self.error = None
+        self.error_line = None
+        self._job = None
+        self._done = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.script.slices)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def start(self):
+        if not self.script.slices:
+            self._done.set()
+            return
+        cmds.undoInfo(openChunk=True, chunkName=self.chunk_name)
+        self._job = cmds.scriptJob(idleEvent=self._run_slice)
+
+    def wait(self, timeout=None):
+        """Blocks until the run has finished, failed or been cancelled."""
+        return self._done.wait(timeout)
+
+    def _run_slice(self):
+        if self._done.is_set():
+            return
+
+        try:
+            self._run_statements()
+            if self.on_progress:
+                self.on_progress(self.position, self.total)
+        except BaseException as e:
+            # on_progress failed; end the run instead of leaving it open
+            self.error = e
+            raise
+        finally:
+            if self.cancelled or self.error is not None or self.position >= self.total:
+                self._finish()
+
+    def _run_statements(self):
+        deadline = time.perf_counter() + self.budget
+        while self.position < self.total:
+            if self.cancel_event.is_set():
+                self.cancelled = True
+                return
+            line, code = self.script.slices[self.position]
+            try:
+                exec(code, self.namespace)
+            except BaseException as e:  # SystemExit too, so the run still ends
+                self.error = e
+                self.error_line = line
+                return
+            self.position += 1
+            if time.perf_counter() >= deadline:
+                return
+
+    def _finish(self):
+        try:
+            cmds.undoInfo(closeChunk=True)
+            job, self._job = self._job, None
+            # Kill the job once its callback has returned, not from inside it
+            maya.utils.executeDeferred(lambda: cmds.scriptJob(kill=job, force=True))
+        finally:
+            self._done.set()
+
+
+def run_sliced(
+    script,
+    namespace,
+    cancel_event=None,
+    on_progress=None,
+    budget_ms=FRAME_BUDGET_MS,
+    chunk_name="MayaTool",
+):
+    """Runs a CompiledScript in slices and blocks until it ends.
+
+    Call from a worker thread: the slices run from idle events, which never
+    fire while the main thread is blocked. Returns the finished SlicedRun.
+    """
+    run = SlicedRun(script, namespace, cancel_event, on_progress, budget_ms, chunk_name)
+    maya.utils.executeInMainThreadWithResult(run.start)
+    run.wait()
+    return run
+
+
+def _exec_codes(codes, namespace, cancel_event=None):
+    """Runs code objects in order; returns False if cancelled part way."""
+    for code in codes:
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        exec(code, namespace)
+    return True
+
+
+def run_hybrid(script, namespace, cancel_event=None, chunk_name="MayaTool"):
+    """Runs a CompiledScript split between this thread and the main thread.
+
+    Call from a worker thread. Statements run in their original order, so
+    data flows between them as usual: runs of pure-Python statements run
+    here, each run of Maya statements goes to the main thread in one hop.
+    The whole script is one undo chunk. Returns False if cancelled between
+    statements, True once everything has run; errors are raised.
+    """
+    maya.utils.executeInMainThreadWithResult(
+        lambda: cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    )
+    try:
+        for on_main, codes in script.segments():
+            if on_main:
+                completed = maya.utils.executeInMainThreadWithResult(
+                    _exec_codes, codes, namespace, cancel_event
+                )
+            else:
+                completed = _exec_codes(codes, namespace, cancel_event)
+            if not completed:
+                return False
+        return True
+    finally:
+        maya.utils.executeInMainThreadWithResult(lambda: cmds.undoInfo(closeChunk=True))
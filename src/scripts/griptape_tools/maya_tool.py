@@ -1,67 +1,475 @@
 from __future__ import annotations
 
+import threading
+import time
+from typing import Callable
+
 import maya
 import maya.cmds as cmds
-from attr import define
+from attr import define, field
 from griptape.artifacts import ErrorArtifact, TextArtifact
 from griptape.tools import BaseTool
 from griptape.utils.decorators import activity
-from schema import Literal, Schema
+from schema import Literal, Optional, Or, Schema
+
+from .bulk_attributes import read_attributes, undo_last_write, write_attributes
+from .command_compiler import compile_commands, format_syntax_error
+from .maya_executor import (
+    BULK_THRESHOLD,
+    EXECUTION_MODES,
+    SLICED_THRESHOLD,
+    choose_mode,
+    run_hybrid,
+    run_script,
+    run_sliced,
+)
+from .result_encoder import (
+    MAX_RESULT_BYTES,
+    encode_results,
+    preview,
+    read_result_page,
+)
+from .scene_index import MAX_TOKENS, get_scene_index
+from .scene_inspector import QUERIES, get_inspector_pool
 
 
 @define
 class MayaTool(BaseTool):
+    # Set by the chat session when the user presses Stop; any tool call that
+    # hasn't started yet is refused while it is set
+    cancel_event: threading.Event = field(factory=threading.Event, kw_only=True)
+    # Called on the main thread as progress_callback(done, total) while a
+    # command list runs in sliced mode
+    progress_callback: Callable | None = field(default=None, kw_only=True)
+    # Called as command_callback(event) while cmd runs: {"event": "start"}, one
+    # {"event": "command"} per recorded statement (index, total, elapsed,
+    # source, result preview) and {"event": "end"}. Must not block; it is
+    # called on the main thread between statements.
+    command_callback: Callable | None = field(default=None, kw_only=True)
+    # Set when running in mayapy, which has no event loop to hand calls to;
+    # Maya is called directly from the agent's thread instead
+    batch_mode: bool = field(default=False, kw_only=True)
+    # The last command list cmd ran without errors, for saving as a macro
+    last_command_list: list | None = field(default=None, init=False)
+    # Activity calls that changed the scene, so callers can tell whether a run
+    # edited it. cmd counts when the scene index or the undo queue changed.
+    edit_count: int = field(default=0, init=False)
+    # Numbers cmd's undo chunks, so each run is a new entry on the undo queue
+    run_count: int = field(default=0, init=False)
+
     @activity(
         config={
-            "description": "Can be used to execute python commands in Maya",
+            "description": "Can be used to execute python commands in Maya. "
+            "Returns a JSON list with the value of every top-level expression "
+            "and assignment, as {line, source, value}. Numbered names are collapsed "
+            "(pCube1..pCube500). If the result is too big, long numeric lists are "
+            "summarized as count/min/max/mean and lists are truncated; use "
+            "page_results with the returned result_id to read all of it.",
             "schema": Schema(
                 {
                     Literal(
                         "command_list",
                         description="Python commands to execute. If using a Maya command, preface it with `cmds`. Examples: ['cmds.ls(sl=1)', 'cmds.polyCube()', 'cmds.polySphere(radius=2)']",
                     ): list[str],
+                    Optional(
+                        Literal(
+                            "mode",
+                            description="How to run the commands. 'bulk' runs them in one "
+                            "undo chunk with viewport refresh suspended; use it when "
+                            "creating or editing many nodes. 'bulk_no_undo' also turns "
+                            "undo off, only for throwaway scratch scenes. 'sliced' runs "
+                            "them a few at a time so Maya stays responsive and the user "
+                            "can stop them; use it for long-running lists. 'hybrid' runs "
+                            "plain Python (math, loops, list building) off Maya's main "
+                            "thread and only the cmds/maya calls on it; use it for "
+                            "compute-heavy scripts. Defaults to "
+                            f"'sliced' for {SLICED_THRESHOLD} or more commands, 'bulk' "
+                            f"for {BULK_THRESHOLD} or more, else 'default'.",
+                        )
+                    ): Or(*EXECUTION_MODES),
+                    Optional(
+                        Literal(
+                            "max_result_bytes",
+                            description="Size budget for the returned result. "
+                            f"Defaults to {MAX_RESULT_BYTES}.",
+                        )
+                    ): int,
                 }
             ),
         }
     )
     def cmd(self, params: dict) -> TextArtifact | ErrorArtifact:
+        if self.cancel_event.is_set():
+            return ErrorArtifact(
+                "Cancelled by the user. Do not run any more commands; stop here."
+            )
+
         command_list = params["values"].get("command_list", [])
         print(f"Executing: {command_list}")
+        try:
+            mode = choose_mode(
+                command_list,
+                params["values"].get("mode"),
+                interactive=not self.batch_mode,
+            )
+        except ValueError as e:
+            return ErrorArtifact(str(e))
 
-        # save the results to a temporary file
-        input_file = "/var/tmp/test.py"
-
-        with open(input_file, "w") as f:
-            f.write("import maya.cmds as cmds\n")
-            f.write("results = []\n")
-            for command in command_list:
-                # if command starts with cmds, then it's a maya command and add it to the results
-                # But the command may be indented, so we'll need to strip it, then add the spacing back
-                # with results.append(command)
-                if command.strip().startswith("cmds."):
-                    # get the spacing that was there in front of the command
-                    spacing = command.split("cmds.")[0]
-                    f.write(f"{spacing}results.append({command})\n")
-                else:
-                    f.write(f"{command}\n")
-
-            # f.write("print(results)")
-        print(f"Saved to {input_file}")
-
-        # Create a namespace
-        namespace = {}
+        # Compile in memory (cached per unique command list) so syntax errors
+        # go straight back to the agent without a trip to the main thread
         try:
-            with open(input_file) as script_file:
-                script_code = script_file.read()
-                # start undo chunk
-                cmds.undoInfo(openChunk=True)
-                maya.utils.executeInMainThreadWithResult(
-                    lambda: exec(script_code, namespace)
+            script = compile_commands(command_list)
+        except SyntaxError as e:
+            return ErrorArtifact(format_syntax_error(e))
+
+        # Every top-level expression and assignment is recorded into results
+        # as {"line", "source", "value"}
+        start = time.perf_counter()
+
+        def on_record(index, result):
+            self.emit_command_event(
+                "command",
+                index=index + 1,
+                total=len(script.sources),
+                elapsed=time.perf_counter() - start,
+                source=result["source"],
+                result=preview(result["value"]),
+            )
+
+        namespace, results = script.create_namespace(
+            on_record=on_record if self.command_callback else None,
+            maya=maya,
+            cmds=cmds,
+        )
+        self.run_count += 1
+        chunk_name = f"MayaTool {self.run_count}"
+        before = self.call_on_main_thread(self.scene_state)
+        self.emit_command_event("start", total=len(script.sources), mode=mode)
+        status = "error"
+        try:
+            if mode == "sliced":
+                # Runs from idle events; this thread waits for the last slice
+                run = run_sliced(
+                    script,
+                    namespace,
+                    self.cancel_event,
+                    self.progress_callback,
+                    chunk_name=chunk_name,
+                )
+                if run.error is not None:
+                    print(f"Execution Error: {run.error}")
+                    where = f" on line {run.error_line}" if run.error_line else ""
+                    return ErrorArtifact(
+                        f"Execution error{where}: {run.error}. "
+                        f"Statements before it ran ({run.position} of {run.total})."
+                    )
+                if run.cancelled:
+                    status = "cancelled"
+                    return ErrorArtifact(
+                        f"Cancelled by the user after {run.position} of "
+                        f"{run.total} statements. Do not run any more commands; "
+                        "stop here."
+                    )
+            elif mode == "hybrid":
+                if not run_hybrid(script, namespace, self.cancel_event, chunk_name):
+                    status = "cancelled"
+                    return ErrorArtifact(
+                        "Cancelled by the user. Do not run any more commands; "
+                        "stop here."
+                    )
+            else:
+                # One main-thread hop; the undo chunk is opened and closed there too
+                self.call_on_main_thread(
+                    run_script, script, namespace, mode, chunk_name
                 )
-                cmds.undoInfo(closeChunk=True)
 
-            # Print results
-            # print(f"Script Execution Completed. Namespace: {namespace}")
-            return TextArtifact(str(namespace["results"]))
+            status = "done"
+            self.last_command_list = list(command_list)
+            return TextArtifact(
+                encode_results(
+                    results, params["values"].get("max_result_bytes", MAX_RESULT_BYTES)
+                )
+            )
         except Exception as e:
             print(f"Execution Error: {e}")
+            return ErrorArtifact(f"Execution error: {e}")
+        finally:
+            # Without undo there is no queue entry to tell, so assume a change
+            if (
+                mode == "bulk_no_undo"
+                or self.call_on_main_thread(self.scene_state) != before
+            ):
+                self.edit_count += 1
+            self.emit_command_event(
+                "end", status=status, elapsed=time.perf_counter() - start
+            )
+
+    def scene_state(self):
+        """The scene index's dirty counter and the last undo entry (main thread).
+
+        Queries leave both alone; node edits bump the counter and undoable
+        edits, like setAttr, add a chunk to the undo queue.
+        """
+        return (
+            get_scene_index().dirty_counter,
+            cmds.undoInfo(q=True, undoName=True),
+        )
+
+    def call_on_main_thread(self, func, *args):
+        if self.batch_mode:
+            return func(*args)
+        return maya.utils.executeInMainThreadWithResult(func, *args)
+
+    def emit_command_event(self, event, **details):
+        if self.command_callback is not None:
+            self.command_callback({"event": event, **details})
+
+    @activity(
+        config={
+            "description": "Can be used to get a compact overview of the Maya scene in "
+            "one call: node counts by type and the DAG hierarchy. Pass a root node "
+            "to see the subtree under it with transforms and world bounding boxes. "
+            "Prefer this over listing the scene with cmds.ls/listRelatives/getAttr.",
+            "schema": Schema(
+                {
+                    Optional(
+                        Literal(
+                            "root",
+                            description="Name of a DAG node to describe the subtree of. "
+                            "Leave out to describe the whole scene.",
+                        )
+                    ): str,
+                    Optional(
+                        Literal(
+                            "max_tokens",
+                            description=f"Size budget for the answer. Defaults to {MAX_TOKENS}.",
+                        )
+                    ): int,
+                    Optional(
+                        Literal(
+                            "details",
+                            description="Include transforms and bounding boxes. Defaults "
+                            "to true when a root is given.",
+                        )
+                    ): bool,
+                }
+            ),
+        }
+    )
+    def describe_scene(self, params: dict) -> TextArtifact | ErrorArtifact:
+        values = params["values"]
+        try:
+            description = self.call_on_main_thread(
+                lambda: get_scene_index().describe(
+                    root=values.get("root"),
+                    max_tokens=values.get("max_tokens", MAX_TOKENS),
+                    details=values.get("details"),
+                )
+            )
+            return TextArtifact(description)
+        except Exception as e:
+            print(f"Scene index error: {e}")
+            return ErrorArtifact(f"Could not describe the scene: {e}")
+
+    @activity(
+        config={
+            "description": "Can be used to inspect a scene file that is not open "
+            "(a referenced, sibling or older version of a file) without touching the "
+            "user's scene. Never open other files with cmds.file for this. Queries: "
+            "'summary' (node counts by type, poly counts, references), 'ls' (node "
+            "names, optionally filtered by nodes pattern and node_type), 'attributes' "
+            "(values of attributes, or all keyable ones, on nodes) and 'describe' "
+            "(hierarchy overview like describe_scene). The last few files stay "
+            "loaded in background Maya processes, one file each, so further queries "
+            "on the same file are fast.",
+            "schema": Schema(
+                {
+                    Literal(
+                        "file", description="Absolute path of the .ma/.mb file."
+                    ): str,
+                    Literal("query", description="What to read."): Or(*QUERIES),
+                    Optional(
+                        Literal(
+                            "nodes",
+                            description="Node names or wildcard patterns for 'ls' "
+                            "and 'attributes'.",
+                        )
+                    ): list[str],
+                    Optional(
+                        Literal("node_type", description="Node type filter for 'ls'.")
+                    ): str,
+                    Optional(
+                        Literal(
+                            "attributes",
+                            description="Attribute names for 'attributes'. Defaults "
+                            "to all keyable attributes.",
+                        )
+                    ): list[str],
+                    Optional(
+                        Literal("root", description="Root node for 'describe'.")
+                    ): str,
+                }
+            ),
+        }
+    )
+    def inspect_scene_file(self, params: dict) -> TextArtifact | ErrorArtifact:
+        values = dict(params["values"])
+        path = values.pop("file")
+        query = values.pop("query")
+        try:
+            response = get_inspector_pool().query(path, query, **values)
+        except Exception as e:
+            print(f"Scene inspector error: {e}")
+            return ErrorArtifact(f"Could not inspect '{path}': {e}")
+
+        print(
+            f"[Griptape] {query} on {path} took {response['seconds']}s"
+            f"{' (already loaded)' if response.get('cached') else ''}"
+        )
+        if not response["ok"]:
+            return ErrorArtifact(f"Could not inspect '{path}': {response['error']}")
+        if isinstance(response["result"], str):
+            return TextArtifact(response["result"])
+        return TextArtifact(
+            encode_results([{"source": query, "value": response["result"]}])
+        )
+
+    @activity(
+        config={
+            "description": "Can be used to set numeric attributes (translate, rotate, "
+            "scale or any other numeric attribute) on many nodes at once. Much faster "
+            "than setAttr/xform commands for layout and scatter tasks. Angles are in "
+            "degrees. Can be reverted with undo_attributes.",
+            "schema": Schema(
+                {
+                    Optional(
+                        Literal(
+                            "nodes",
+                            description="Node names or wildcard patterns, e.g. ['pCube*']. "
+                            "Leave out to use the current selection.",
+                        )
+                    ): list[str],
+                    Literal(
+                        "values",
+                        description="Maps attribute names to values: one value per node "
+                        "(e.g. [[x, y, z], ...] for translate), a single value for all "
+                        "nodes (e.g. [0, 1, 0]), or an expression string using "
+                        "arithmetic, n (the node count) and common np, np.random and "
+                        "math functions, e.g. 'np.random.uniform(-10, 10, (n, 3))'.",
+                    ): dict,
+                    Optional(
+                        Literal(
+                            "relative",
+                            description="Add the values to the current ones instead of "
+                            "replacing them.",
+                        )
+                    ): bool,
+                }
+            ),
+        }
+    )
+    def set_attributes(self, params: dict) -> TextArtifact | ErrorArtifact:
+        if self.cancel_event.is_set():
+            return ErrorArtifact("Cancelled by the user.")
+
+        values = params["values"]
+        try:
+            count = self.call_on_main_thread(
+                write_attributes,
+                values.get("nodes"),
+                values["values"],
+                values.get("relative", False),
+            )
+            if count:
+                self.edit_count += 1
+            return TextArtifact(f"Set {', '.join(values['values'])} on {count} nodes.")
+        except Exception as e:
+            print(f"Bulk attribute error: {e}")
+            return ErrorArtifact(f"Could not set attributes: {e}")
+
+    @activity(
+        config={
+            "description": "Can be used to read numeric attributes from many nodes at "
+            "once. Returns JSON with the node names and one value (or [x, y, z] for "
+            "compound attributes) per node, in the same order. Angles are in "
+            "degrees. Long lists in big results are summarized; use page_results with "
+            "the returned result_id to read them all.",
+            "schema": Schema(
+                {
+                    Optional(
+                        Literal(
+                            "nodes",
+                            description="Node names or wildcard patterns. Leave out to "
+                            "use the current selection.",
+                        )
+                    ): list[str],
+                    Literal(
+                        "attributes",
+                        description="Attribute names, e.g. ['translate', 'visibility'].",
+                    ): list[str],
+                }
+            ),
+        }
+    )
+    def get_attributes(self, params: dict) -> TextArtifact | ErrorArtifact:
+        values = params["values"]
+        try:
+            names, arrays = self.call_on_main_thread(
+                read_attributes, values.get("nodes"), values["attributes"]
+            )
+            results = [{"source": "nodes", "value": names}] + [
+                {"source": attribute, "value": array.tolist()}
+                for attribute, array in arrays.items()
+            ]
+            return TextArtifact(encode_results(results))
+        except Exception as e:
+            print(f"Bulk attribute error: {e}")
+            return ErrorArtifact(f"Could not read attributes: {e}")
+
+    @activity(
+        config={
+            "description": "Can be used to revert the last set_attributes call, "
+            "if nothing else was done in Maya since.",
+        }
+    )
+    def undo_attributes(self) -> TextArtifact:
+        if self.call_on_main_thread(undo_last_write):
+            self.edit_count += 1
+            return TextArtifact("Reverted the last set_attributes call.")
+        return TextArtifact(
+            "The last change in Maya wasn't a set_attributes call; nothing reverted."
+        )
+
+    @activity(
+        config={
+            "description": "Can be used to read a truncated result in pages, using the "
+            "result_id it returned.",
+            "schema": Schema(
+                {
+                    Literal(
+                        "result_id", description="The result_id to page through."
+                    ): str,
+                    Optional(
+                        Literal(
+                            "offset", description="First row to return. Defaults to 0."
+                        )
+                    ): int,
+                    Optional(
+                        Literal("limit", description="Number of rows. Defaults to 100.")
+                    ): int,
+                }
+            ),
+        }
+    )
+    def page_results(self, params: dict) -> TextArtifact | ErrorArtifact:
+        values = params["values"]
+        try:
+            return TextArtifact(
+                read_result_page(
+                    values["result_id"],
+                    values.get("offset", 0),
+                    values.get("limit", 100),
+                )
+            )
+        except KeyError as e:
+            return ErrorArtifact(str(e))
@@ -2,10 +2,31 @@
 import importlib
 import pkgutil
 import sys
+import time
 
 import maya.cmds as cmds
-from griptape_tools.api_keys import show_api_key_manager
-from griptape_tools.chatbot import show_chatbot
+
+from .warmup import set_warmup_enabled, warmup_enabled
+
+# Seconds each menu target took to import on its first click
+import_timings = {}
+
+
+def lazy_command(module_name, function_name, *function_args):
+    """Returns a menu command that imports its module on the first click.
+
+    Keeps Maya startup from paying for griptape, PySide and the tools until
+    they are actually used.
+    """
+
+    def command(*args):
+        if module_name not in sys.modules:
+            start = time.perf_counter()
+            importlib.import_module(module_name)
+            import_timings[module_name] = time.perf_counter() - start
+        getattr(sys.modules[module_name], function_name)(*function_args)
+
+    return command
 
 
 def create_menu():
@@ -20,10 +41,36 @@ def rebuild_menu():
 
     griptape_menu = cmds.menu("GriptapeTools", label="Griptape", parent="MayaWindow")
 
-    cmds.menuItem(label="API Key Manager", command=lambda x: show_api_key_manager())
-    cmds.menuItem(label="Chatbot", command=lambda x: show_chatbot())
+    cmds.menuItem(
+        label="API Key Manager",
+        command=lazy_command("griptape_tools.api_keys", "show_api_key_manager"),
+    )
+    cmds.menuItem(
+        label="Chatbot", command=lazy_command("griptape_tools.chatbot", "show_chatbot")
+    )
+
+    # Saved macros, listed when the submenu opens
+    macro_menu = cmds.menuItem(label="Macros", subMenu=True, tearOff=True)
+    cmds.menuItem(
+        macro_menu,
+        e=True,
+        postMenuCommand=lazy_command(
+            "griptape_tools.macros", "build_macro_menu", macro_menu
+        ),
+    )
+    cmds.setParent("..", menu=True)
 
     cmds.menuItem(divider=True)
+    cmds.menuItem(
+        label="Warm Up Agent at Startup",
+        annotation="Also starts the mayapy processes that inspect other scene files",
+        checkBox=warmup_enabled(),
+        command=set_warmup_enabled,
+    )
+    cmds.menuItem(
+        label="Import Times",
+        command=lazy_command("griptape_tools.import_report", "show_import_report"),
+    )
     cmds.menuItem(label="Reload Tools", command=reload_tools)
 
 
@@ -49,6 +96,11 @@ def reload_tools(*args):
         # Add the base package
         modules.append(griptape_tools)
 
+        # Let modules remove Maya callbacks before their code is replaced
+        for module in modules:
+            if hasattr(module, "teardown"):
+                module.teardown()
+
         # Reload all modules in reverse (dependencies first)
         for module in reversed(modules):
             print(f"Reloading {module.__name__}")
@@ -0,0 +1,68 @@
+import os
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+# This file is also a Maya plug-in with one undoable command. MDGModifier edits
+# made from a script never reach Maya's undo queue; run through the command,
+# Maya's undo and redo call the modifier's undoIt and doIt.
+COMMAND_NAME = "griptapeApplyModifier"
+PLUGIN_PATH = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+
+# The modifier the next command call applies. Maya loads the plug-in file as
+# a separate module, so the command always reads it from this package module.
+_pending = []
+
+
+def maya_useNewAPI():
+    """Tells Maya the plug-in uses the Python API 2.0."""
+
+
+class ApplyModifierCommand(om.MPxCommand):
+    def __init__(self):
+        super().__init__()
+        self.modifier = None
+
+    @staticmethod
+    def creator():
+        return ApplyModifierCommand()
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        from griptape_tools.modifier_command import take_pending
+
+        self.modifier = take_pending()
+        if self.modifier is None:
+            raise RuntimeError(f"{COMMAND_NAME} is only run by apply_modifier")
+        self.modifier.doIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin).registerCommand(COMMAND_NAME, ApplyModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
+
+
+def take_pending():
+    return _pending.pop() if _pending else None
+
+
+def apply_modifier(modifier):
+    """Applies an MDGModifier as one undoable command (main thread)."""
+    if not cmds.pluginInfo(PLUGIN_PATH, q=True, loaded=True):
+        cmds.loadPlugin(PLUGIN_PATH, quiet=True)
+    _pending[:] = [modifier]
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        _pending.clear()
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import deque
+
+from attr import define, field
+
+
+class RequestCancelled(Exception):
+    """Raised inside an agent run to end it once its request is cancelled."""
+
+
+@define
+class ChatRequest:
+    message: str
+    # Skip the response cache and always ask the agent
+    bypass_cache: bool = False
+    enqueued_at: float = field(factory=time.monotonic)
+    started_at: float | None = None
+
+    @property
+    def wait_time(self):
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class RequestQueue:
+    """Runs chat requests one at a time, in order, on a single worker thread.
+
+    `handler(request, cancel_event)` is called on the worker for each request.
+    `cancel()` sets the event for the in-flight request and drops everything
+    still waiting, so the handler should check the event between chunks.
+    """
+
+    def __init__(self, handler, name="GriptapeChatWorker"):
+        self.handler = handler
+        self.cancel_event = threading.Event()
+        self.current = None
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, message, **options):
+        """Adds a message to the end of the queue and returns its request."""
+        request = ChatRequest(message=message, **options)
+        with self._condition:
+            self._pending.append(request)
+            self._condition.notify()
+        return request
+
+    def cancel(self):
+        """Stops the in-flight request and drops all queued ones.
+
+        Returns the number of queued requests that were dropped.
+        """
+        with self._condition:
+            dropped = len(self._pending)
+            self._pending.clear()
+            if self.current is not None:
+                self.cancel_event.set()
+        return dropped
+
+    def shutdown(self):
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self.cancel_event.set()
+            self._condition.notify()
+
+    @property
+    def depth(self):
+        """Number of requests waiting to start (not counting the in-flight one)."""
+        return len(self._pending)
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def oldest_wait_time(self):
+        """Seconds the oldest queued request has been waiting, or 0."""
+        with self._condition:
+            if not self._pending:
+                return 0.0
+            return self._pending[0].wait_time
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                request = self._pending.popleft()
+                request.started_at = time.monotonic()
+                self.cancel_event.clear()
+                self.current = request
+
+            try:
+                self.handler(request, self.cancel_event)
+            except Exception as e:
+                print(f"[Griptape] Request failed: {e}")
+            finally:
+                with self._condition:
+                    self.current = None
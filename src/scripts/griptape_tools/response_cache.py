@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import maya.cmds as cmds
+
+from .scene_index import get_scene_index
+
+# Most answers kept, and most bytes they may take on disk
+MAX_ENTRIES = 500
+MAX_BYTES = 5 * 1024 * 1024
+INDEX_FILE = "index.json"
+# Earlier turns of the conversation that are part of the key
+RECENT_TURNS = 3
+
+
+def normalize_prompt(text):
+    """Folds case, whitespace and trailing punctuation, so "List all cameras?"
+    and "list all  cameras" share an answer."""
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!. ").lower()
+
+
+def scene_fingerprint():
+    """A cheap summary of the scene state an answer may depend on (main thread).
+
+    Combines the scene file, the index's node count, its dirty counter and
+    the selection. The counter is bumped by the index's scene callbacks:
+    nodes added, removed or reparented, connections, file operations, and
+    undo and redo. Attribute edits made by hand aren't counted until they
+    are undone; that, and edits the agent made, are why turns that ran
+    scene-changing tools aren't stored, and what the bypass is for.
+    """
+    index = get_scene_index()
+    selection = cmds.ls(selection=True, long=True) or []
+    return {
+        "scene": cmds.file(q=True, sceneName=True),
+        "nodes": index.node_count(),
+        "dirty": index.dirty_counter,
+        "selection": hashlib.sha1("\n".join(selection).encode()).hexdigest(),
+    }
+
+
+def conversation_digest(runs, turns=RECENT_TURNS):
+    """Hashes the last `turns` conversation runs, so a follow-up like "and the
+    lights?" is only reused after the same conversation."""
+    recent = [[run.input.value, run.output.value] for run in runs[-turns:]]
+    return hashlib.sha1(json.dumps(recent).encode()).hexdigest()
+
+
+def cache_key(prompt, fingerprint, model=None, conversation=None):
+    data = json.dumps(
+        [normalize_prompt(prompt), fingerprint, model, conversation], sort_keys=True
+    )
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """Answers to earlier prompts, kept on disk.
+
+    Each answer is a JSON file in `folder`; the index file holds them in
+    least-recently-used order with their sizes, plus hit/miss statistics.
+    The oldest answers are evicted past `max_entries` or `max_bytes`.
+    """
+
+    def __init__(self, folder, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> size in bytes, oldest first
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "saved_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @property
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def get(self, key):
+        """Returns the cached entry ("prompt", "answer", "seconds") or None."""
+        with self._lock:
+            entry = None
+            if key in self.entries:
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    del self.entries[key]
+            if entry is None:
+                self.stats["misses"] += 1
+            else:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += entry["seconds"]
+            self._save_index()
+            return entry
+
+    def put(self, key, prompt, answer, seconds):
+        """Stores an answer that took `seconds` to produce."""
+        data = json.dumps(
+            {
+                "prompt": prompt,
+                "answer": answer,
+                "seconds": seconds,
+                "time": time.time(),
+            }
+        )
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self._path(key), "w", encoding="utf-8") as f:
+                f.write(data)
+            self.entries[key] = len(data)
+            self.entries.move_to_end(key)
+            self.stats["stores"] += 1
+            self._evict()
+            self._save_index()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self.entries):
+                self._remove(key)
+            self._save_index()
+
+    def report(self):
+        return (
+            f"[Griptape] Response cache: {self.stats['hits']} hits, "
+            f"{self.stats['misses']} misses ({self.hit_rate:.0%}), "
+            f"{self.stats['saved_seconds']:.1f}s saved, {len(self.entries)} answers"
+        )
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def _evict(self):
+        total = sum(self.entries.values())
+        while self.entries and (
+            len(self.entries) > self.max_entries or total > self.max_bytes
+        ):
+            key = next(iter(self.entries))
+            total -= self.entries[key]
+            self._remove(key)
+
+    def _remove(self, key):
+        del self.entries[key]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.folder, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.entries = OrderedDict(index.get("entries", []))
+        self.stats.update(index.get("stats", {}))
+
+    def _save_index(self):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"entries": list(self.entries.items()), "stats": self.stats}, f)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,245 @@
+import itertools
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+
+# Default size of a tool result sent back to the LLM (~4 bytes per token)
+MAX_RESULT_BYTES = 8000
+# Numeric lists longer than this are summarized when a result is over budget
+NUMERIC_SUMMARY_THRESHOLD = 12
+# Number of full results kept for paging
+RESULT_CACHE_SIZE = 32
+# Rows returned per page by default
+PAGE_SIZE = 100
+
+NAME_NUMBER_RE = re.compile(r"^(.*?)(\d+)$")
+# List lengths tried, in order, when a result has to be cut down to size
+TRUNCATED_LENGTHS = (50, 20, 10, 5, 2)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _round(value):
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return repr(value)
+        return float(f"{value:.6g}")
+    return value
+
+
+def collapse_names(names):
+    """Collapses runs of numbered names, e.g. pCube1, pCube2, pCube3 -> "pCube1..pCube3"."""
+    collapsed = []
+    run = []
+
+    def flush():
+        if len(run) >= 3:
+            collapsed.append(f"{run[0]}..{run[-1]}")
+        else:
+            collapsed.extend(run)
+        run.clear()
+
+    previous = None
+    for name in names:
+        match = NAME_NUMBER_RE.match(name)
+        key = None
+        if match:
+            prefix, digits = match.groups()
+            key = (prefix, int(digits))
+        if (
+            key
+            and previous
+            and key[0] == previous[0]
+            and key[1] == previous[1] + 1
+            and run
+        ):
+            run.append(name)
+        else:
+            flush()
+            run.append(name)
+        previous = key
+    flush()
+    return collapsed
+
+
+def summarize_numbers(values):
+    """Count/min/max/mean of a numeric list, or per column for a list of rows."""
+    if values and isinstance(values[0], (list, tuple)):
+        columns = list(zip(*values))
+        return {
+            "count": len(values),
+            "shape": [len(values), len(columns)],
+            "min": [_round(min(column)) for column in columns],
+            "max": [_round(max(column)) for column in columns],
+            "mean": [_round(sum(column) / len(column)) for column in columns],
+        }
+    return {
+        "count": len(values),
+        "min": _round(min(values)),
+        "max": _round(max(values)),
+        "mean": _round(sum(values) / len(values)),
+    }
+
+
+def _is_numeric_rows(values):
+    if not values or not isinstance(values[0], (list, tuple)):
+        return False
+    width = len(values[0])
+    return width > 0 and all(
+        isinstance(row, (list, tuple))
+        and len(row) == width
+        and all(_is_number(item) for item in row)
+        for row in values
+    )
+
+
+def compact(value, max_items=None, summarize=True):
+    """Returns a smaller, JSON-friendly version of a command result.
+
+    Lists of names have numbered runs collapsed, floats are rounded, and
+    anything JSON can't hold becomes its repr. With `summarize`, long numeric
+    lists are replaced by their count/min/max/mean. With `max_items`,
+    remaining long lists are cut to that length.
+    """
+    if isinstance(value, dict):
+        return {
+            str(key): compact(item, max_items, summarize) for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+        if items and all(isinstance(item, str) for item in items):
+            items = collapse_names(items)
+        elif (
+            summarize
+            and len(items) > NUMERIC_SUMMARY_THRESHOLD
+            and (all(_is_number(item) for item in items) or _is_numeric_rows(items))
+        ):
+            return summarize_numbers(items)
+        else:
+            items = [compact(item, max_items, summarize) for item in items]
+        if max_items is not None and len(items) > max_items:
+            items = items[:max_items] + [f"... {len(items) - max_items} more"]
+        return items
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return _round(value)
+    if hasattr(value, "tolist"):
+        # NumPy arrays and scalars
+        return compact(value.tolist(), max_items, summarize)
+    return repr(value)
+
+
+def to_json(value):
+    return json.dumps(value, separators=(",", ":"), default=repr)
+
+
+def preview(value, max_length=80):
+    """Returns a one-line JSON preview of a value, cut to `max_length` characters."""
+    text = to_json(compact(value, max_items=3))
+    if len(text) > max_length:
+        text = text[: max_length - 3] + "..."
+    return text
+
+
+def result_rows(results):
+    """Flattens command results into rows for paging.
+
+    Each recorded statement becomes one row, or one row per item when its
+    value is a list.
+    """
+    rows = []
+    for result in results:
+        value = result.get("value") if isinstance(result, dict) else None
+        if isinstance(value, (list, tuple)) and len(value) > 1:
+            # Rows point back at the statement (or attribute) they came from
+            origin = "line" if "line" in result else "source"
+            for index, item in enumerate(value):
+                rows.append({origin: result.get(origin), "index": index, "value": item})
+        else:
+            rows.append(result)
+    return rows
+
+
+class ResultCache:
+    """Keeps full results that were too big to send, so they can be paged."""
+
+    def __init__(self, max_size=RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, rows):
+        with self._lock:
+            result_id = f"result-{next(self._ids)}"
+            self._entries[result_id] = rows
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        with self._lock:
+            rows = self._entries.get(result_id)
+            if rows is not None:
+                self._entries.move_to_end(result_id)
+            return rows
+
+
+result_cache = ResultCache()
+
+
+def encode_results(results, max_bytes=MAX_RESULT_BYTES):
+    """Encodes command results as compact JSON within a byte budget.
+
+    Results that fit are returned in full. Otherwise the full results are
+    kept in the result cache, and a summarized (and if need be truncated)
+    version is returned along with the id to page through them with
+    `read_result_page`.
+    """
+    text = to_json(compact(results, summarize=False))
+    if len(text) <= max_bytes:
+        return text
+
+    rows = result_rows(results)
+    result_id = result_cache.add(rows)
+    note = {
+        "truncated": True,
+        "result_id": result_id,
+        "total_rows": len(rows),
+        "hint": "Use page_results with this result_id to read the full rows.",
+    }
+    for max_items in (None, *TRUNCATED_LENGTHS):
+        text = to_json({"results": compact(results, max_items), **note})
+        if len(text) <= max_bytes:
+            return text
+    return to_json(note)
+
+
+def read_result_page(result_id, offset=0, limit=PAGE_SIZE, max_bytes=MAX_RESULT_BYTES):
+    """Returns a page of rows from a cached result as JSON within the budget."""
+    rows = result_cache.get(result_id)
+    if rows is None:
+        raise KeyError(f"Unknown or expired result id '{result_id}'")
+
+    limit = max(1, limit)
+    while True:
+        page = rows[offset : offset + limit]
+        text = to_json(
+            {
+                "result_id": result_id,
+                "offset": offset,
+                "total_rows": len(rows),
+                "rows": compact(page, summarize=False),
+                "next_offset": offset + len(page)
+                if offset + len(page) < len(rows)
+                else None,
+            }
+        )
+        if len(text) <= max_bytes or limit == 1:
+            return text
+        limit //= 2
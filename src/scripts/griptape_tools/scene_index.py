@@ -0,0 +1,418 @@
+import math
+from collections import Counter, OrderedDict
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+# Default size of a scene description, roughly 4 characters per token
+MAX_TOKENS = 1000
+CHARS_PER_TOKEN = 4
+# Children listed per node before the rest are summarized by type
+MAX_CHILDREN_LISTED = 20
+# Nodes whose transform/bounding box is cached (and watched for changes)
+GEOMETRY_CACHE_SIZE = 2000
+
+SCENE_RESET_MESSAGES = (
+    om.MSceneMessage.kBeforeNew,
+    om.MSceneMessage.kBeforeOpen,
+    om.MSceneMessage.kBeforeImport,
+    om.MSceneMessage.kBeforeCreateReference,
+    om.MSceneMessage.kBeforeLoadReference,
+    om.MSceneMessage.kBeforeRemoveReference,
+    om.MSceneMessage.kBeforeUnloadReference,
+)
+# Events that change the scene without adding, removing or reparenting nodes;
+# every edit made in Maya can be undone, so undo and redo catch them coming back
+SCENE_CHANGE_EVENTS = ("Undo", "Redo")
+
+
+class _DagRecord:
+    __slots__ = ("handle", "type_name", "parent", "children")
+
+    def __init__(self, handle, type_name, parent=None):
+        self.handle = handle
+        self.type_name = type_name
+        self.parent = parent
+        self.children = set()
+
+
+class _NodeKey:
+    """Dictionary key for a node.
+
+    MObjectHandle.hashCode() is only a hash: different nodes can share it.
+    It is used to find the bucket, and the handles themselves decide whether
+    two keys are the same node.
+    """
+
+    __slots__ = ("handle", "_hash")
+
+    def __init__(self, obj):
+        self.handle = om.MObjectHandle(obj)
+        # Kept, so the key still hashes the same after its node is deleted
+        self._hash = self.handle.hashCode()
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, _NodeKey) and self.handle == other.handle
+
+
+def _key(obj):
+    return _NodeKey(obj)
+
+
+class SceneIndex:
+    """A compact copy of the scene hierarchy, built once and kept up to date.
+
+    The hierarchy and node type counts are built with OpenMaya iterators the
+    first time they're needed, then maintained through node added/removed
+    and parent added/removed callbacks. Transforms and bounding boxes are
+    read on demand and cached in parent space, with an attribute-changed
+    callback on each cached node to drop stale entries. File operations that touch lots of
+    nodes (open, import, references) just mark the index stale; it is rebuilt
+    on the next query.
+
+    All methods must be called on Maya's main thread.
+    """
+
+    def __init__(self):
+        # Bumped by every scene change the callbacks see
+        self.dirty_counter = 0
+        self._records = {}
+        self._roots = set()
+        self._type_counts = Counter()
+        self._geometry = OrderedDict()
+        self._stale = True
+        self._callback_ids = []
+        self._install_callbacks()
+
+    # Building
+
+    def rebuild(self):
+        self._clear_geometry()
+        self._records = {}
+        self._roots = set()
+        self._type_counts = Counter()
+
+        node_iter = om.MItDependencyNodes()
+        while not node_iter.isDone():
+            self._type_counts[om.MFnDependencyNode(node_iter.thisNode()).typeName] += 1
+            node_iter.next()
+
+        dag_iter = om.MItDag(om.MItDag.kDepthFirst)
+        while not dag_iter.isDone():
+            obj = dag_iter.currentItem()
+            if not obj.hasFn(om.MFn.kWorld):
+                self._add_dag_node(obj)
+            dag_iter.next()
+        self._stale = False
+
+    def _ensure_current(self):
+        if self._stale:
+            self.rebuild()
+
+    def _add_dag_node(self, obj):
+        key = _key(obj)
+        fn = om.MFnDagNode(obj)
+        parent_key = None
+        if fn.parentCount():
+            parent = fn.parent(0)
+            if not parent.hasFn(om.MFn.kWorld):
+                parent_key = _key(parent)
+                if parent_key not in self._records:
+                    self._add_dag_node(parent)
+
+        record = self._records.get(key)
+        if record is None:
+            record = _DagRecord(key.handle, fn.typeName)
+            self._records[key] = record
+        self._set_parent(key, parent_key)
+
+    def _set_parent(self, key, parent_key):
+        record = self._records[key]
+        if record.parent is None:
+            self._roots.discard(key)
+        elif record.parent in self._records:
+            self._records[record.parent].children.discard(key)
+
+        record.parent = parent_key
+        if parent_key is None:
+            self._roots.add(key)
+        else:
+            self._records[parent_key].children.add(key)
+
+    def _remove_dag_node(self, key):
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+        if record.parent is None:
+            self._roots.discard(key)
+        elif record.parent in self._records:
+            self._records[record.parent].children.discard(key)
+        for child_key in record.children:
+            child = self._records.get(child_key)
+            if child is not None:
+                child.parent = None
+                self._roots.add(child_key)
+        self._forget_geometry(key)
+
+    # Callbacks
+
+    def _install_callbacks(self):
+        self._callback_ids = [
+            om.MDGMessage.addNodeAddedCallback(self._on_node_added, "dependNode"),
+            om.MDGMessage.addNodeRemovedCallback(self._on_node_removed, "dependNode"),
+            om.MDagMessage.addParentAddedCallback(self._on_parent_changed),
+            om.MDagMessage.addParentRemovedCallback(self._on_parent_changed),
+            om.MDGMessage.addConnectionCallback(self._on_scene_changed),
+        ]
+        for event in SCENE_CHANGE_EVENTS:
+            self._callback_ids.append(
+                om.MEventMessage.addEventCallback(event, self._on_scene_changed)
+            )
+        for message in SCENE_RESET_MESSAGES:
+            self._callback_ids.append(
+                om.MSceneMessage.addCallback(message, self._on_scene_reset)
+            )
+
+    def remove_callbacks(self):
+        self._clear_geometry()
+        if self._callback_ids:
+            om.MMessage.removeCallbacks(self._callback_ids)
+        self._callback_ids = []
+
+    def _on_scene_reset(self, *args):
+        self.dirty_counter += 1
+        self._stale = True
+        self._clear_geometry()
+
+    def _on_scene_changed(self, *args):
+        self.dirty_counter += 1
+
+    def _on_node_added(self, obj, *args):
+        self.dirty_counter += 1
+        if self._stale:
+            return
+        self._type_counts[om.MFnDependencyNode(obj).typeName] += 1
+        if obj.hasFn(om.MFn.kDagNode):
+            self._add_dag_node(obj)
+
+    def _on_node_removed(self, obj, *args):
+        self.dirty_counter += 1
+        if self._stale:
+            return
+        type_name = om.MFnDependencyNode(obj).typeName
+        self._type_counts[type_name] -= 1
+        if self._type_counts[type_name] <= 0:
+            del self._type_counts[type_name]
+        if obj.hasFn(om.MFn.kDagNode):
+            self._remove_dag_node(_key(obj))
+
+    def _on_parent_changed(self, child_path, parent_path, *args):
+        self.dirty_counter += 1
+        if self._stale:
+            return
+        child = child_path.node()
+        key = _key(child)
+        if key not in self._records:
+            return
+        # Re-read the node's first parent; covers both added and removed
+        self._add_dag_node(child)
+        self._forget_geometry(key)
+
+    def _on_attribute_changed(self, message, plug, other_plug, key):
+        if message & (
+            om.MNodeMessage.kAttributeSet
+            | om.MNodeMessage.kConnectionMade
+            | om.MNodeMessage.kConnectionBroken
+        ):
+            self.dirty_counter += 1
+            self._forget_geometry(key)
+
+    # Transforms and bounding boxes
+
+    def _geometry_for(self, key):
+        """Returns the transform and world bounding box of a node.
+
+        The bounding box is cached in its parent's space, so moving an
+        ancestor doesn't make it stale; the world matrix is applied here.
+        """
+        path = om.MDagPath.getAPathTo(self._records[key].handle.object())
+        transform, local_bbox = self._local_geometry_for(key, path)
+        bbox = om.MBoundingBox(local_bbox)
+        bbox.transformUsing(path.exclusiveMatrix())
+        return transform, (tuple(bbox.min)[:3], tuple(bbox.max)[:3])
+
+    def _local_geometry_for(self, key, path):
+        """Returns the cached transform and parent-space bounding box of a node."""
+        if key in self._geometry:
+            self._geometry.move_to_end(key)
+            return self._geometry[key][0]
+
+        obj = path.node()
+        transform = None
+        if obj.hasFn(om.MFn.kTransform):
+            fn = om.MFnTransform(path)
+            rotation = fn.rotation(om.MSpace.kTransform, asQuaternion=False)
+            transform = (
+                tuple(fn.translation(om.MSpace.kTransform)),
+                tuple(
+                    math.degrees(angle)
+                    for angle in (rotation.x, rotation.y, rotation.z)
+                ),
+                tuple(fn.scale()),
+            )
+        geometry = (transform, om.MFnDagNode(path).boundingBox)
+
+        callback_id = om.MNodeMessage.addAttributeChangedCallback(
+            obj, self._on_attribute_changed, key
+        )
+        self._geometry[key] = (geometry, callback_id)
+        while len(self._geometry) > GEOMETRY_CACHE_SIZE:
+            _, (_, old_callback_id) = self._geometry.popitem(last=False)
+            om.MMessage.removeCallback(old_callback_id)
+        return geometry
+
+    def _forget_geometry(self, key):
+        entry = self._geometry.pop(key, None)
+        if entry is not None:
+            om.MMessage.removeCallback(entry[1])
+        # A child's change changes its ancestors' bounding boxes too; their
+        # descendants' boxes are relative to them and stay valid
+        record = self._records.get(key)
+        parent_key = record.parent if record else None
+        while parent_key is not None:
+            entry = self._geometry.pop(parent_key, None)
+            if entry is not None:
+                om.MMessage.removeCallback(entry[1])
+            parent = self._records.get(parent_key)
+            parent_key = parent.parent if parent else None
+
+    def _clear_geometry(self):
+        if self._geometry:
+            om.MMessage.removeCallbacks([entry[1] for entry in self._geometry.values()])
+        self._geometry.clear()
+
+    # Queries
+
+    def node_count(self):
+        self._ensure_current()
+        return sum(self._type_counts.values())
+
+    def describe(self, root=None, max_tokens=MAX_TOKENS, details=None):
+        """Returns a text summary of the scene or of the hierarchy under `root`.
+
+        The output stays within roughly `max_tokens` tokens. Transforms and
+        world bounding boxes are included when `details` is true, which is the
+        default when a root is given.
+        """
+        self._ensure_current()
+        budget = max_tokens * CHARS_PER_TOKEN
+        if details is None:
+            details = root is not None
+
+        lines = []
+        if root:
+            try:
+                root_obj = om.MSelectionList().add(root).getDependNode(0)
+            except RuntimeError:
+                return f"No node named '{root}' in the scene."
+            root_key = _key(root_obj)
+            if root_key not in self._records:
+                return f"'{root}' is not a DAG node."
+            keys = [root_key]
+        else:
+            scene = cmds.file(q=True, sceneName=True) or "untitled"
+            lines.append(
+                f"Scene: {scene} ({self.node_count()} nodes, "
+                f"{len(self._records)} DAG nodes)"
+            )
+            counts = ", ".join(
+                f"{type_name} {count}"
+                for type_name, count in self._type_counts.most_common(30)
+            )
+            lines.append(f"Node types: {counts}")
+            lines.append("Hierarchy:")
+            keys = self._sorted(self._roots)
+
+        used = sum(len(line) + 1 for line in lines)
+        # Depth-first; entries are (node key, depth) or (summary line, None)
+        stack = [(key, 0) for key in reversed(keys)]
+        omitted = 0
+        while stack:
+            entry, depth = stack.pop()
+            if depth is None:
+                line = entry
+            else:
+                line = self._describe_node(entry, depth, details)
+            if used + len(line) + 1 > budget:
+                omitted = len(stack) + 1
+                break
+            lines.append(line)
+            used += len(line) + 1
+            if depth is None:
+                continue
+
+            children = self._sorted(self._records[entry].children)
+            if len(children) > MAX_CHILDREN_LISTED:
+                rest = Counter(
+                    self._records[child].type_name
+                    for child in children[MAX_CHILDREN_LISTED:]
+                )
+                types = ", ".join(f"{t} x{n}" for t, n in rest.most_common(5))
+                count = len(children) - MAX_CHILDREN_LISTED
+                indent = "  " * (depth + 1)
+                stack.append((f"{indent}... {count} more children ({types})", None))
+                children = children[:MAX_CHILDREN_LISTED]
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+        if omitted:
+            lines.append(
+                f"... output truncated at ~{max_tokens} tokens; call again with a "
+                "root node to see a subtree."
+            )
+        return "\n".join(lines)
+
+    def _sorted(self, keys):
+        return sorted(keys, key=lambda key: self._name(key))
+
+    def _name(self, key):
+        return om.MFnDagNode(self._records[key].handle.object()).name()
+
+    def _describe_node(self, key, depth, details):
+        record = self._records[key]
+        line = f"{'  ' * depth}{self._name(key)} ({record.type_name}"
+        if record.children:
+            line += f", {len(record.children)} children"
+        line += ")"
+        if details:
+            transform, (bbox_min, bbox_max) = self._geometry_for(key)
+            if transform:
+                translate, rotate, scale = transform
+                line += f" t={_round(translate)} r={_round(rotate)} s={_round(scale)}"
+            line += f" bbox={_round(bbox_min)}..{_round(bbox_max)}"
+        return line
+
+
+def _round(values):
+    return "(" + ", ".join(f"{value:.3g}" for value in values) + ")"
+
+
+_scene_index = None
+
+
+def get_scene_index():
+    """Returns the shared scene index, creating it on first use (main thread)."""
+    global _scene_index
+    if _scene_index is None:
+        _scene_index = SceneIndex()
+    return _scene_index
+
+
+def teardown():
+    """Removes the index's callbacks, e.g. before the module is reloaded."""
+    global _scene_index
+    if _scene_index is not None:
+        _scene_index.remove_callbacks()
+        _scene_index = None
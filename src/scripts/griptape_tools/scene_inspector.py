@@ -0,0 +1,311 @@
+import inspect
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import maya.cmds as cmds
+
+from .result_encoder import to_json
+
+# mayapy processes kept running for inspecting other scene files; each keeps
+# one file loaded
+WORKER_COUNT = 2
+# Seconds a query may take, including loading its file, before the process
+# is killed and replaced
+REQUEST_TIMEOUT = 120.0
+QUERIES = ("summary", "ls", "attributes", "describe")
+
+
+def find_mayapy():
+    """Returns the path of the mayapy that belongs to this Maya."""
+    name = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+    candidates = [os.path.join(os.path.dirname(sys.executable), name)]
+    if os.environ.get("MAYA_LOCATION"):
+        candidates.insert(0, os.path.join(os.environ["MAYA_LOCATION"], "bin", name))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    raise RuntimeError("Could not find mayapy; set MAYA_LOCATION")
+
+
+class InspectorWorker:
+    """A mayapy process that answers queries about the one scene it has loaded.
+
+    Requests and responses are single JSON lines over the process's stdin and
+    stdout. A reader thread queues the responses, so a request can wait with
+    a deadline. The lock keeps one request in flight per process.
+    """
+
+    def __init__(self, mayapy, index):
+        scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [scripts_dir, env.get("PYTHONPATH")])
+        )
+        self.log_path = os.path.join(
+            tempfile.gettempdir(), f"griptape-inspector-{os.getpid()}-{index}.log"
+        )
+        with open(self.log_path, "w") as log:
+            self.process = subprocess.Popen(
+                [mayapy, "-m", "griptape_tools.scene_inspector"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=log,
+                env=env,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        self.loaded_file = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self._ids = 0
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_responses, daemon=True).start()
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _read_responses(self):
+        for line in self.process.stdout:
+            self._responses.put(line)
+        self._responses.put("")  # the process exited
+
+    def request(self, path, query, args, timeout=REQUEST_TIMEOUT):
+        """Sends a query and waits for its response. Call with `lock` held.
+
+        Raises TimeoutError, after killing the process, if there is no
+        response within `timeout` seconds.
+        """
+        self._ids += 1
+        request = {"id": self._ids, "file": path, "query": query, "args": args}
+        deadline = time.monotonic() + timeout
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            pass  # it exited; the reader thread says so
+        while True:
+            try:
+                line = self._responses.get(
+                    timeout=max(deadline - time.monotonic(), 0.0)
+                )
+            except queue.Empty:
+                self.kill()
+                raise TimeoutError(
+                    f"Scene inspector took over {timeout:.0f}s on '{path}'; "
+                    f"restarted it. See {self.log_path}"
+                )
+            if not line:
+                self.loaded_file = None
+                raise RuntimeError(
+                    f"Scene inspector process exited; see {self.log_path}"
+                )
+            response = json.loads(line)
+            # Skip an answer to an earlier request that timed out
+            if response.get("id") == self._ids:
+                return response
+
+    def kill(self):
+        self.loaded_file = None
+        self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        if self.alive:
+            # The worker exits when its stdin closes
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class SceneInspectorPool:
+    """A few long-lived mayapy processes for read-only queries on unopened scene
+    files.
+
+    One file per process: each process keeps the last file it opened loaded,
+    so repeated queries on that file skip the load, and the pool as a whole
+    keeps the `size` most recently used files. A file already loaded
+    somewhere is always sent there; a new file goes to an idle process,
+    replacing its scene, the least recently used one. A process that doesn't
+    answer within `timeout` is killed and replaced. The user's session is
+    never touched.
+    """
+
+    def __init__(self, size=WORKER_COUNT, mayapy=None, timeout=REQUEST_TIMEOUT):
+        self.mayapy = mayapy or find_mayapy()
+        self.timeout = timeout
+        # Processes start booting right away. The startup warm-up creates the
+        # pool when it is turned on; otherwise the first query does, and waits
+        # for Maya to boot.
+        self.workers = [InspectorWorker(self.mayapy, i) for i in range(size)]
+        self._lock = threading.Lock()
+
+    def _route(self, path):
+        with self._lock:
+            for i, worker in enumerate(self.workers):
+                if not worker.alive and not worker.lock.locked():
+                    self.workers[i] = InspectorWorker(self.mayapy, i)
+
+            worker = next((w for w in self.workers if w.loaded_file == path), None)
+            if worker is None:
+                idle = [w for w in self.workers if not w.lock.locked()]
+                worker = min(idle or self.workers, key=lambda w: w.last_used)
+                # Claim it now so concurrent queries for this file follow
+                worker.loaded_file = path
+            worker.last_used = time.monotonic()
+            return worker
+
+    def query(self, path, query, **args):
+        """Runs a query against a scene file and returns the worker's response.
+
+        The response has "ok", "result" or "error", "cached" (the file was
+        already loaded) and "seconds".
+        """
+        path = os.path.normcase(os.path.abspath(path))
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No scene file at '{path}'")
+        if query not in QUERIES:
+            raise ValueError(f"Unknown query '{query}'. Use one of {QUERIES}")
+        worker = self._route(path)
+        with worker.lock:
+            try:
+                return worker.request(path, query, args, timeout=self.timeout)
+            except TimeoutError:
+                self._replace(worker)
+                raise
+
+    def _replace(self, worker):
+        """Starts a fresh process in place of a killed one, so it is warm
+        by the next query."""
+        with self._lock:
+            index = self.workers.index(worker)
+            self.workers[index] = InspectorWorker(self.mayapy, index)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_inspector_pool():
+    """Returns the shared inspector pool, starting its processes on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SceneInspectorPool()
+        return _pool
+
+
+def teardown():
+    """Stops the inspector processes, e.g. before the module is reloaded."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+# Queries, run inside the mayapy worker
+
+
+def query_summary():
+    nodes = cmds.ls() or []
+    counts = Counter(cmds.nodeType(node) for node in nodes)
+    meshes = cmds.ls(type="mesh", noIntermediate=True) or []
+    return {
+        "file": cmds.file(q=True, sceneName=True),
+        "nodes": len(nodes),
+        "dag_nodes": len(cmds.ls(dag=True) or []),
+        "types": dict(counts.most_common(30)),
+        "meshes": len(meshes),
+        "faces": cmds.polyEvaluate(meshes, face=True) if meshes else 0,
+        "vertices": cmds.polyEvaluate(meshes, vertex=True) if meshes else 0,
+        "references": cmds.file(q=True, reference=True) or [],
+    }
+
+
+def query_ls(nodes=None, node_type=None):
+    options = {"type": node_type} if node_type else {}
+    return cmds.ls(nodes or "*", **options) or []
+
+
+def query_attributes(nodes=None, attributes=None):
+    values = {}
+    for node in cmds.ls(nodes or [], long=False) or []:
+        names = attributes or cmds.listAttr(node, keyable=True) or []
+        values[node] = {}
+        for attribute in names:
+            try:
+                values[node][attribute] = cmds.getAttr(f"{node}.{attribute}")
+            except (RuntimeError, ValueError) as e:
+                values[node][attribute] = f"<error: {e}>"
+    return values
+
+
+def query_describe(root=None, max_tokens=None):
+    from .scene_index import MAX_TOKENS, get_scene_index
+
+    return get_scene_index().describe(root=root, max_tokens=max_tokens or MAX_TOKENS)
+
+
+def serve():
+    """Worker loop: answers JSON line requests on stdin until it closes."""
+    # Keep the real stdout for responses; anything Maya prints goes to the log
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    handlers = {
+        "summary": query_summary,
+        "ls": query_ls,
+        "attributes": query_attributes,
+        "describe": query_describe,
+    }
+
+    loaded = None  # (path, modification time)
+    for line in sys.stdin:
+        request = json.loads(line)
+        start = time.perf_counter()
+        response = {"id": request["id"]}
+        try:
+            path = request["file"]
+            modified = os.path.getmtime(path)
+            response["cached"] = loaded == (path, modified)
+            if not response["cached"]:
+                loaded = None
+                cmds.file(path, open=True, force=True, prompt=False, ignoreVersion=True)
+                loaded = (path, modified)
+            handler = handlers[request["query"]]
+            # Only pass the options this query takes
+            parameters = inspect.signature(handler).parameters
+            args = {
+                key: value
+                for key, value in request.get("args", {}).items()
+                if key in parameters
+            }
+            result = handler(**args)
+            response.update(ok=True, result=result)
+        except Exception as e:
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        response["seconds"] = round(time.perf_counter() - start, 3)
+        responses.write(to_json(response) + "\n")
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,86 @@
+import time
+from collections import deque
+
+
+class StreamBuffer:
+    """Hands streamed chunks from a worker thread to the main thread in batches.
+
+    The worker calls `push` for every chunk and never waits on Maya. A timer on
+    the main thread calls `drain` at a fixed cadence and inserts everything that
+    arrived since the last flush in one go.
+    """
+
+    def __init__(self):
+        # deque.append / popleft are atomic in CPython, so no lock is needed
+        self._chunks = deque()
+        self.closed = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.token_count = 0
+        self.flush_count = 0
+        self.first_token_time = None
+        self.last_token_time = None
+
+    def open(self):
+        """Start a new response."""
+        self._chunks.clear()
+        self.closed = False
+        self.reset_stats()
+
+    def push(self, text):
+        """Queue a chunk. Safe to call from any thread."""
+        if self.closed:
+            return
+        now = time.perf_counter()
+        if self.first_token_time is None:
+            self.first_token_time = now
+        self.last_token_time = now
+        self.token_count += 1
+        self._chunks.append(text)
+
+    def push_event(self, text):
+        """Queue text that isn't part of the reply itself (e.g. tool progress).
+
+        It's flushed with the reply but left out of the token stats.
+        """
+        if not self.closed:
+            self._chunks.append(text)
+
+    def close(self):
+        """Mark the response as finished once the queue has been drained.
+
+        Chunks pushed after this are dropped.
+        """
+        self.closed = True
+
+    def drain(self):
+        """Return everything queued since the last call as a single string."""
+        parts = []
+        while True:
+            try:
+                parts.append(self._chunks.popleft())
+            except IndexError:
+                break
+        if parts:
+            self.flush_count += 1
+        return "".join(parts)
+
+    @property
+    def finished(self):
+        return self.closed and not self._chunks
+
+    def tokens_per_second(self):
+        if self.first_token_time is None or self.last_token_time is None:
+            return 0.0
+        elapsed = self.last_token_time - self.first_token_time
+        if elapsed <= 0:
+            return float(self.token_count)
+        return self.token_count / elapsed
+
+    def report(self, coalesced=True):
+        mode = "coalesced" if coalesced else "per-chunk"
+        return (
+            f"[Griptape] {self.token_count} tokens, {self.flush_count} flushes, "
+            f"{self.tokens_per_second():.1f} tokens/sec ({mode})"
+        )
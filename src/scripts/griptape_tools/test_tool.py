@@ -2,9 +2,12 @@ import maya.cmds as cmds
 from griptape.drivers.prompt.ollama import OllamaPromptDriver
 from griptape.structures import Agent
 
+from .http_transport import use_shared_transport
+
 
 def hello_griptape():
-    agent = Agent(prompt_driver=OllamaPromptDriver(model="llama3.2"))
+    driver = use_shared_transport(OllamaPromptDriver(model="llama3.2"))
+    agent = Agent(prompt_driver=driver)
     response = agent.run("Generate a fun greeting about Maya and Griptape.ai")
     cmds.confirmDialog(title="Griptape Test", message=response.output, button=["OK"])
 
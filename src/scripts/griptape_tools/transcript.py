@@ -0,0 +1,438 @@
+import json
+import os
+import weakref
+from array import array
+
+from attr import define
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QSize, Qt, Signal
+from PySide6.QtGui import QAbstractTextDocumentLayout, QKeySequence, QTextDocument
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QListView,
+    QStyle,
+    QStyledItemDelegate,
+)
+
+# Number of blocks kept in memory before the oldest ones are spilled to disk
+MAX_BLOCKS = 500
+# Number of blocks read back from disk each time the user scrolls to the top
+PAGE_SIZE = 100
+
+STYLE_SHEET = """
+    pre { background-color: #2B2B2B; color: #E0E0E0; }
+    code { font-family: monospace; }
+"""
+
+
+@define(slots=True)
+class ChatBlock:
+    """One rendered block of the transcript (a message line, paragraph, list...)."""
+
+    html: str
+    # Cached layout height for the width it was last laid out at
+    height: int = -1
+    width: int = -1
+
+    def to_json(self):
+        return json.dumps({"html": self.html})
+
+    @classmethod
+    def from_json(cls, line):
+        return cls(html=json.loads(line)["html"])
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillFile:
+    """The JSONL file transcript blocks are spilled to, created on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def open(self):
+        if self.handle is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.handle = open(self.path, "w+b")
+        return self.handle
+
+    def close(self):
+        """Closes and deletes the file; using it again starts a new one."""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        remove_file(self.path)
+
+
+class TranscriptModel(QAbstractListModel):
+    """Holds the chat transcript as a list of compact blocks.
+
+    At most `max_blocks` blocks live in memory. Older blocks are appended to a
+    JSONL spill file and read back a page at a time when the user scrolls up;
+    the newest blocks are then paged out in turn, and read back when the user
+    scrolls down again. The last block can be marked as open so it can be
+    replaced while a reply is still streaming.
+    """
+
+    def __init__(self, spill_path, max_blocks=MAX_BLOCKS, parent=None):
+        super().__init__(parent)
+        self.max_blocks = max_blocks
+        self.spill_path = spill_path
+        self._blocks = []
+        # Global index of self._blocks[0]; blocks before it are only on disk
+        self._first_index = 0
+        # Number of blocks after the last one in memory; only on disk
+        self._newer_count = 0
+        # Byte offset of every block written to the spill file
+        self._offsets = array("q")
+        self._spill = SpillFile(spill_path)
+        self._has_open_block = False
+        # Closes the file before deleting it, should close() never be called
+        self._finalizer = weakref.finalize(self, self._spill.close)
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._blocks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.UserRole):
+            return None
+        block = self._blocks[index.row()]
+        return block.html if role == Qt.DisplayRole else block
+
+    # Appending
+
+    def append_block(self, html):
+        """Adds a finished block at the end of the transcript."""
+        self.set_open_block([html], "")
+
+    def set_open_block(self, finished, open_html):
+        """Replaces the open last block with finished blocks and a new open block."""
+        # New blocks go after the newest ones, so those have to be in memory
+        while self._newer_count:
+            self.load_newer_blocks()
+            self.trim()
+
+        new_blocks = [ChatBlock(html=block_html) for block_html in finished]
+        if open_html:
+            new_blocks.append(ChatBlock(html=open_html))
+
+        if self._has_open_block:
+            last = len(self._blocks) - 1
+            if new_blocks:
+                # Reuse the open row for the first new block
+                self._blocks[last] = new_blocks.pop(0)
+                index = self.index(last)
+                self.dataChanged.emit(index, index)
+            else:
+                self.beginRemoveRows(QModelIndex(), last, last)
+                self._blocks.pop()
+                self.endRemoveRows()
+
+        if new_blocks:
+            first = len(self._blocks)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_blocks) - 1)
+            self._blocks.extend(new_blocks)
+            self.endInsertRows()
+
+        self._has_open_block = bool(open_html)
+        self.trim()
+
+    def close_open_block(self):
+        """Marks the open block as finished without changing it."""
+        self._has_open_block = False
+        self.trim()
+
+    # Spilling to disk
+
+    def trim(self):
+        """Spills the oldest blocks to disk until at most max_blocks remain.
+
+        Returns the number of blocks removed from the top.
+        """
+        excess = len(self._blocks) - self.max_blocks
+        if excess <= 0:
+            return 0
+        if self._has_open_block:
+            excess = min(excess, len(self._blocks) - 1)
+
+        self._write_blocks(excess)
+        self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+        del self._blocks[:excess]
+        self._first_index += excess
+        self.endRemoveRows()
+        return excess
+
+    def trim_newer(self):
+        """Pages the newest blocks out to disk until at most max_blocks remain.
+
+        Used after older blocks were paged in at the top. A reply that is
+        still streaming is never paged out. Returns the number removed.
+        """
+        excess = len(self._blocks) - self.max_blocks
+        if excess <= 0 or self._has_open_block:
+            return 0
+
+        self._write_blocks(len(self._blocks))
+        first = len(self._blocks) - excess
+        self.beginRemoveRows(QModelIndex(), first, len(self._blocks) - 1)
+        del self._blocks[first:]
+        self._newer_count += excess
+        self.endRemoveRows()
+        return excess
+
+    def _write_blocks(self, count):
+        """Makes sure the first `count` blocks in memory are on disk."""
+        # Blocks that were paged back in are already there
+        spill_file = self._spill.open()
+        spill_file.seek(0, os.SEEK_END)
+        for offset in range(count):
+            if self._first_index + offset < len(self._offsets):
+                continue
+            self._offsets.append(spill_file.tell())
+            spill_file.write(self._blocks[offset].to_json().encode("utf-8") + b"\n")
+        spill_file.flush()
+
+    def _read_blocks(self, start, count):
+        spill_file = self._spill.open()
+        blocks = []
+        for offset in self._offsets[start : start + count]:
+            # Prepended blocks are written after the ones that follow them
+            spill_file.seek(offset)
+            blocks.append(ChatBlock.from_json(spill_file.readline().decode("utf-8")))
+        return blocks
+
+    def has_older_blocks(self):
+        return self._first_index > 0
+
+    def has_newer_blocks(self):
+        return self._newer_count > 0
+
+    def load_older_blocks(self, count=PAGE_SIZE):
+        """Reads the previous page of spilled blocks back from disk.
+
+        The newest blocks are paged out to make room. Returns the number of
+        blocks that were inserted at the top.
+        """
+        count = min(count, self._first_index)
+        if count <= 0:
+            return 0
+
+        start = self._first_index - count
+        blocks = self._read_blocks(start, count)
+        self.beginInsertRows(QModelIndex(), 0, count - 1)
+        self._blocks[:0] = blocks
+        self._first_index = start
+        self.endInsertRows()
+        self.trim_newer()
+        return count
+
+    def load_newer_blocks(self, count=PAGE_SIZE):
+        """Reads the next page of paged-out blocks back from disk.
+
+        Returns the number of blocks that were added at the bottom; call trim
+        afterwards to page out the oldest ones again.
+        """
+        count = min(count, self._newer_count)
+        if count <= 0:
+            return 0
+
+        first = len(self._blocks)
+        blocks = self._read_blocks(self._first_index + first, count)
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self._blocks.extend(blocks)
+        self._newer_count -= count
+        self.endInsertRows()
+        return count
+
+    def prepend_blocks(self, htmls):
+        """Inserts finished blocks before everything else, e.g. older turns.
+
+        Only possible once every spilled older block has been paged back in.
+        The newest blocks are paged out to make room. Returns the number of
+        blocks that were inserted.
+        """
+        if self._first_index or not htmls:
+            return 0
+
+        blocks = [ChatBlock(html=block_html) for block_html in htmls]
+        if self._newer_count:
+            # The newest blocks are only on disk, so the file is kept and the
+            # new blocks are written too, keeping every index before them on disk
+            spill_file = self._spill.open()
+            spill_file.seek(0, os.SEEK_END)
+            offsets = array("q")
+            for block in blocks:
+                offsets.append(spill_file.tell())
+                spill_file.write(block.to_json().encode("utf-8") + b"\n")
+            spill_file.flush()
+            self._offsets = offsets + self._offsets
+        else:
+            # Everything on disk is in memory again, so the spill file can restart
+            self._offsets = array("q")
+            if self._spill.handle:
+                self._spill.handle.seek(0)
+                self._spill.handle.truncate()
+
+        self.beginInsertRows(QModelIndex(), 0, len(blocks) - 1)
+        self._blocks[:0] = blocks
+        self.endInsertRows()
+        self.trim_newer()
+        return len(blocks)
+
+    def clear(self):
+        """Removes every block and releases the spill file."""
+        self.beginResetModel()
+        self._blocks = []
+        self._first_index = 0
+        self._newer_count = 0
+        self._offsets = array("q")
+        self._has_open_block = False
+        self.close()
+        self.endResetModel()
+
+    def close(self):
+        """Closes and deletes the spill file.
+
+        Blocks already spilled can't be read back afterwards, so this is for
+        when the transcript is cleared or goes away; spilling again starts a
+        new file.
+        """
+        self._spill.close()
+
+
+class ChatBlockDelegate(QStyledItemDelegate):
+    """Paints a block's HTML with a QTextDocument, laid out only when needed."""
+
+    def __init__(self, view):
+        super().__init__(view)
+        self._view = view
+        self._document = QTextDocument()
+        self._document.setDefaultStyleSheet(STYLE_SHEET)
+        self._document.setDocumentMargin(2)
+
+    def _layout(self, block, width):
+        self._document.setHtml(block.html)
+        self._document.setTextWidth(width)
+        return self._document
+
+    def sizeHint(self, option, index):
+        block = index.data(Qt.UserRole)
+        width = self._view.viewport().width()
+        if block.width != width:
+            block.height = int(self._layout(block, width).size().height())
+            block.width = width
+        return QSize(width, block.height)
+
+    def paint(self, painter, option, index):
+        block = index.data(Qt.UserRole)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        document = self._layout(block, option.rect.width())
+        painter.save()
+        painter.translate(option.rect.topLeft())
+        painter.setClipRect(0, 0, option.rect.width(), option.rect.height())
+        context = QAbstractTextDocumentLayout.PaintContext()
+        document.documentLayout().draw(painter, context)
+        painter.restore()
+
+
+class TranscriptView(QListView):
+    """List view over a TranscriptModel that lays out only the visible rows.
+
+    Scrolling to the top pages older blocks back in from disk, and scrolling
+    to the bottom pages the newer ones back in. The view follows new output
+    as long as it was already scrolled to the end of the transcript.
+    `top_reached` is emitted when the user scrolls to the top and there is
+    nothing left to page in.
+    """
+
+    top_reached = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setItemDelegate(ChatBlockDelegate(self))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setResizeMode(QListView.Adjust)
+        self.setWordWrap(True)
+        self._follow_output = True
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.rowsInserted.connect(self._on_rows_changed)
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self._on_model_reset)
+
+    def _on_scrolled(self, value):
+        scroll_bar = self.verticalScrollBar()
+        model = self.model()
+        at_bottom = value >= scroll_bar.maximum()
+        self._follow_output = at_bottom and not (model and model.has_newer_blocks())
+        if not model:
+            return
+        if at_bottom and model.has_newer_blocks():
+            model.load_newer_blocks()
+            self.insert_at_top(model.trim)
+        elif value != scroll_bar.minimum():
+            return
+        elif model.has_older_blocks():
+            self.insert_at_top(model.load_older_blocks)
+        else:
+            self.top_reached.emit()
+
+    def insert_at_top(self, insert):
+        """Calls `insert()` to add (or remove) rows at the top without moving
+        the visible rows."""
+        scroll_bar = self.verticalScrollBar()
+        old_value = scroll_bar.value()
+        old_maximum = scroll_bar.maximum()
+        if insert():
+            self.doItemsLayout()
+            scroll_bar.setValue(old_value + scroll_bar.maximum() - old_maximum)
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        # The block's HTML changed, so its cached height is stale
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            block = self.model().index(row).data(Qt.UserRole)
+            block.width = -1
+        self.scheduleDelayedItemsLayout()
+        self._on_rows_changed()
+
+    def _on_model_reset(self):
+        # A cleared transcript starts out following new output again
+        self._follow_output = True
+
+    def _on_rows_changed(self, *args):
+        if self._follow_output:
+            self.scrollToBottom()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scheduleDelayedItemsLayout()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy_selection()
+            return
+        super().keyPressEvent(event)
+
+    def copy_selection(self):
+        """Copies the selected blocks to the clipboard as plain text."""
+        document = QTextDocument()
+        lines = []
+        for index in sorted(self.selectedIndexes(), key=lambda i: i.row()):
+            document.setHtml(index.data(Qt.DisplayRole))
+            lines.append(document.toPlainText())
+        QApplication.clipboard().setText("\n".join(lines))
@@ -0,0 +1,293 @@
+import io
+import queue
+import threading
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from griptape.artifacts import AudioArtifact
+
+from .audio_output import SPEECH_RATE, StreamingResampler
+from .maya_audio_recorder import SAMPLE_RATE, AudioRecorder
+
+# Length of one voice activity analysis frame
+FRAME_SECONDS = 0.02
+# Speech has to be this much louder than the noise floor
+ENERGY_MARGIN_DB = 10.0
+# Frames quieter than this are never speech
+MIN_ENERGY_DB = -55.0
+# Fraction of samples changing sign above which a frame sounds like hiss
+# (fans, breath) unless it is clearly loud
+MAX_ZERO_CROSSING_RATE = 0.3
+# A pause this long ends a segment, which is transcribed straight away
+SEGMENT_PAUSE_SECONDS = 0.3
+# A pause this long ends the utterance, which is sent to the chat
+UTTERANCE_PAUSE_SECONDS = 1.0
+# Stretches of speech shorter than this are ignored (clicks, bumps)
+MIN_SPEECH_SECONDS = 0.15
+# Audio kept from before speech starts, so soft onsets aren't cut off
+PRE_ROLL_SECONDS = 0.2
+
+
+class VoiceActivityDetector:
+    """Flags speech frames by energy and zero-crossing rate.
+
+    Audio is cut into fixed frames (leftover samples wait for the next
+    block) and every frame of a block is measured in one vectorized pass. A
+    frame is speech when it is well above the noise floor, unless it only
+    just clears it with a hiss-like zero-crossing rate. The noise floor drops
+    quickly to quiet blocks and rises slowly, so speech doesn't pull it up.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS):
+        self.frame_length = int(sample_rate * frame_seconds)
+        self.noise_floor_db = MIN_ENERGY_DB
+        self._leftover = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        """Returns the block's complete frames, shape (n, frame_length), and
+        a speech flag for each."""
+        samples = np.concatenate([self._leftover, samples])
+        count = len(samples) // self.frame_length
+        self._leftover = samples[count * self.frame_length :]
+        frames = samples[: count * self.frame_length].reshape(count, self.frame_length)
+        if not count:
+            return frames, np.zeros(0, dtype=bool)
+
+        energy_db = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (
+            self.frame_length - 1
+        )
+
+        threshold = max(self.noise_floor_db + ENERGY_MARGIN_DB, MIN_ENERGY_DB)
+        flags = (energy_db > threshold) & (
+            (crossing_rate < MAX_ZERO_CROSSING_RATE)
+            | (energy_db > threshold + ENERGY_MARGIN_DB)
+        )
+
+        quiet = float(np.percentile(energy_db, 10))
+        rate = 0.5 if quiet < self.noise_floor_db else 0.02
+        self.noise_floor_db += rate * (quiet - self.noise_floor_db)
+        return frames, flags
+
+
+class SpeechSegmenter:
+    """Groups flagged frames into speech segments and utterances.
+
+    feed() yields ("segment", samples) when a short pause ends a stretch of
+    speech and ("end", None) when a longer pause ends the utterance.
+    """
+
+    def __init__(self, frame_seconds=FRAME_SECONDS):
+        self.segment_pause = round(SEGMENT_PAUSE_SECONDS / frame_seconds)
+        self.utterance_pause = round(UTTERANCE_PAUSE_SECONDS / frame_seconds)
+        self.min_speech = round(MIN_SPEECH_SECONDS / frame_seconds)
+        self.pre_roll = deque(maxlen=round(PRE_ROLL_SECONDS / frame_seconds))
+        self.in_utterance = False
+        self._segment = []
+        self._speech_frames = 0
+        self._silence = 0  # frames since the last speech
+
+    def feed(self, frames, flags):
+        for frame, speech in zip(frames, flags):
+            if speech:
+                if not self._segment:
+                    self._segment.extend(self.pre_roll)
+                    self.pre_roll.clear()
+                self._segment.append(frame)
+                self._speech_frames += 1
+                self._silence = 0
+                continue
+
+            self._silence += 1
+            if self._segment:
+                self._segment.append(frame)
+                if self._silence >= self.segment_pause:
+                    yield from self._end_segment()
+            else:
+                self.pre_roll.append(frame)
+                if self.in_utterance and self._silence >= self.utterance_pause:
+                    self.in_utterance = False
+                    yield "end", None
+
+    def flush(self):
+        """Ends whatever is in progress, e.g. when recording stops."""
+        yield from self._end_segment()
+        if self.in_utterance:
+            self.in_utterance = False
+            yield "end", None
+
+    def _end_segment(self):
+        frames, speech_frames = self._segment, self._speech_frames
+        self._segment = []
+        self._speech_frames = 0
+        if speech_frames >= self.min_speech:
+            self.in_utterance = True
+            yield "segment", np.concatenate(frames)
+
+
+def wav_bytes(samples, sample_rate):
+    """Encodes mono float samples as a 16-bit WAV file in memory."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16))
+    return buffer.getvalue()
+
+
+class GriptapeTranscriber:
+    """Transcribes segments with a Griptape audio transcription driver.
+
+    Defaults to OpenAI's Whisper. The text so far is passed as the prompt, so
+    words split across segments come out consistently. Segments are
+    resampled to `upload_rate` first; speech models don't use more, and it
+    cuts the upload to about a third.
+    """
+
+    def __init__(self, driver=None, upload_rate=SPEECH_RATE):
+        if driver is None:
+            from griptape.drivers.audio_transcription.openai import (
+                OpenAiAudioTranscriptionDriver,
+            )
+
+            driver = OpenAiAudioTranscriptionDriver(model="whisper-1")
+        self.driver = driver
+        self.upload_rate = upload_rate
+
+    def transcribe(self, samples, sample_rate, context=""):
+        if self.upload_rate and sample_rate > self.upload_rate:
+            samples = StreamingResampler(sample_rate, self.upload_rate).process(samples)
+            sample_rate = self.upload_rate
+        artifact = AudioArtifact(wav_bytes(samples, sample_rate), format="wav")
+        prompts = [context] if context else None
+        return self.driver.run(artifact, prompts).value.strip()
+
+
+class LocalTranscriber:
+    """Offline stand-in for tests and demos.
+
+    Returns the given texts in turn, then a placeholder naming the segment's
+    length. Segment lengths are kept in `segments`.
+    """
+
+    def __init__(self, texts=None):
+        self.texts = list(texts or [])
+        self.segments = []
+
+    def transcribe(self, samples, sample_rate, context=""):
+        seconds = len(samples) / sample_rate
+        self.segments.append(seconds)
+        if self.texts:
+            return self.texts.pop(0)
+        return f"[{seconds:.1f}s of speech]"
+
+
+class VoicePromptPipeline:
+    """Turns live speech into chat messages.
+
+    Microphone blocks go through voice activity detection on a worker
+    thread. Each segment is transcribed in the background while the user
+    keeps talking, and when the utterance ends its text goes to
+    `on_text(text)` (called on the transcription thread). Only the last
+    segment's transcription sits between the end of speech and the message.
+    A pipeline listens once: after stop() or teardown() its transcription
+    thread exits, so start a new one to listen again.
+    """
+
+    def __init__(self, on_text, transcriber=None, sample_rate=SAMPLE_RATE):
+        self.on_text = on_text
+        self.transcriber = transcriber or GriptapeTranscriber()
+        self.sample_rate = sample_rate
+        self.detector = VoiceActivityDetector(sample_rate)
+        self.segmenter = SpeechSegmenter()
+        self.recorder = AudioRecorder(
+            path=None,
+            sample_rate=sample_rate,
+            channels=1,
+            block_callback=self._on_block,
+        )
+        self._blocks = queue.Queue()
+        # One transcription at a time keeps segments in order
+        self._transcription = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="griptape-transcribe"
+        )
+        self._texts = []
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts listening; returns the recorder's Future, which fails if the
+        microphone can't be opened."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self.recorder.start()
+
+    def stop(self):
+        """Stops listening; speech in progress is still transcribed and sent.
+
+        The transcription thread exits once that is done.
+        """
+        self.recorder.stop()
+        self._blocks.put(None)
+
+    def teardown(self):
+        """Stops listening and drops speech that hasn't been sent yet, e.g.
+        when the chat window closes."""
+        with self._lock:
+            self._closed = True
+            self._transcription.shutdown(wait=False, cancel_futures=True)
+        self.stop()
+
+    def process(self, samples):
+        """Runs a block of mono samples through the pipeline."""
+        frames, flags = self.detector.process(samples)
+        self._handle(self.segmenter.feed(frames, flags))
+
+    def _on_block(self, block):
+        self._blocks.put(block[:, 0].copy())
+
+    def _run(self):
+        while True:
+            block = self._blocks.get()
+            if block is None:
+                break
+            self.process(block)
+        self._handle(self.segmenter.flush())
+        # Transcriptions already queued still run, then the thread exits
+        self._transcription.shutdown(wait=False)
+
+    def _handle(self, events):
+        with self._lock:
+            if self._closed:
+                return
+            for kind, samples in events:
+                if kind == "segment":
+                    self._transcription.submit(self._transcribe, samples)
+                else:
+                    self._transcription.submit(self._send)
+
+    def _transcribe(self, samples):
+        try:
+            text = self.transcriber.transcribe(
+                samples, self.sample_rate, context=" ".join(self._texts)
+            )
+        except Exception as e:
+            print(f"[Griptape] Transcription failed: {e}")
+            return
+        if text:
+            self._texts.append(text)
+
+    def _send(self):
+        text = " ".join(self._texts).strip()
+        self._texts = []
+        if text:
+            self.on_text(text)
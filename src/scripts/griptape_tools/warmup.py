@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import maya.cmds as cmds
+import maya.utils
+
+# Maya optionVar that turns the startup warm-up on
+OPTION_VAR = "griptapeWarmUpAgent"
+# The shared transport keeps idle connections for a minute, but servers may
+# close them sooner
+KEEPALIVE_INTERVAL = 20.0
+# How long the connection is kept open after the chat takes the agent,
+# enough to type a first message
+KEEPALIVE_SECONDS = 120
+# How long the chat window waits for a warm-up that is still building
+TAKE_TIMEOUT = 10
+
+_warm_agent = None  # Future for the agent being warmed up
+_keepalive_stop = threading.Event()
+
+
+def warmup_enabled():
+    return bool(cmds.optionVar(exists=OPTION_VAR) and cmds.optionVar(q=OPTION_VAR))
+
+
+def set_warmup_enabled(enabled):
+    cmds.optionVar(iv=(OPTION_VAR, int(bool(enabled))))
+
+
+def schedule_warmup():
+    """Warms up an agent once Maya is idle, if the user turned it on."""
+    if warmup_enabled():
+        maya.utils.executeDeferred(start_warmup)
+
+
+def start_warmup():
+    """Builds and warms an agent for the chat window on a background thread,
+    and starts the scene inspector's processes."""
+    global _warm_agent
+    if _warm_agent is not None:
+        return _warm_agent
+    _warm_agent = Future()
+    threading.Thread(target=_warm_up, args=(_warm_agent,), daemon=True).start()
+    return _warm_agent
+
+
+def take_warm_agent():
+    """Returns the warmed-up agent, or None if there is none.
+
+    The agent is handed out once. Its connection is then kept open for a
+    while, so the first message doesn't pay for connecting either.
+    """
+    global _warm_agent
+    future, _warm_agent = _warm_agent, None
+    if future is None:
+        return None
+    try:
+        agent = future.result(timeout=TAKE_TIMEOUT)
+    except Exception as e:
+        print(f"[Griptape] Agent warm-up not used: {e}")
+        return None
+    _keepalive_stop.clear()
+    threading.Thread(
+        target=_keep_alive, args=(agent.prompt_driver,), daemon=True
+    ).start()
+    return agent
+
+
+def ping_driver(driver):
+    """Makes a cheap request so the driver's client has an open connection.
+
+    Returns False for clients it doesn't know how to ping.
+    """
+    client = driver.client
+    if hasattr(client, "models"):  # OpenAI, Anthropic
+        client.models.list()
+    elif hasattr(client, "list"):  # Ollama
+        client.list()
+    else:
+        return False
+    return True
+
+
+def _warm_up(future):
+    start = time.perf_counter()
+    try:
+        # Imported here so Maya startup doesn't wait for griptape
+        from .agent_factory import create_agent
+
+        agent = create_agent(stream=True)
+        driver = agent.prompt_driver
+        for tool in agent.tools:
+            for activity in tool.activities():
+                tool.to_activity_json_schema(activity, "Parameters Schema")
+        driver.tokenizer.count_tokens("warm up")
+    except Exception as e:
+        future.set_exception(e)
+        return
+    future.set_result(agent)
+
+    try:
+        # Boot the scene inspector's mayapy processes too, so the first
+        # inspect_scene_file call doesn't wait for them
+        from .scene_inspector import get_inspector_pool
+
+        get_inspector_pool()
+    except Exception as e:
+        print(f"[Griptape] Scene inspector not started while warming up: {e}")
+
+    try:
+        connected = ping_driver(driver)
+    except Exception as e:
+        print(f"[Griptape] Could not reach the prompt driver while warming up: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    print(
+        f"[Griptape] Agent warmed up in {elapsed:.2f}s"
+        + ("" if connected else " (connection not pre-opened)")
+    )
+
+
+def _keep_alive(driver):
+    deadline = time.monotonic() + KEEPALIVE_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if not ping_driver(driver):
+                return
+        except Exception:
+            return
+        if _keepalive_stop.wait(KEEPALIVE_INTERVAL):
+            return
+
+
+def teardown():
+    """Stops keeping the connection alive, e.g. before the module is reloaded."""
+    _keepalive_stop.set()
@@ -4,8 +4,9 @@ from pathlib import Path
 
 import maya.cmds as cmds
 import maya.utils
-from griptape_tools.api_keys import API_KEYS  # ✅ Import API key definitions
+from griptape_tools.api_key_names import API_KEYS  # ✅ Import API key definitions
 from griptape_tools.menu import create_menu
+from griptape_tools.warmup import schedule_warmup
 
 
 def load_api_keys():
@@ -79,6 +80,9 @@ def initialize_griptape():
         except Exception as e:
             cmds.warning(f"Failed to create Griptape menu: {str(e)}")
 
+        # Opt-in: builds the chat agent in the background once Maya is idle
+        schedule_warmup()
+
         print("Griptape Tools initialized successfully")
         print("---------------------------------------------")
     except Exception as e:
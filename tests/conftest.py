@@ -0,0 +1,18 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# The tools, the stand-in maya package and the test helpers
+PATHS = [
+    os.path.join(os.path.dirname(TESTS_DIR), "src", "scripts"),
+    os.path.join(TESTS_DIR, "stubs"),
+    TESTS_DIR,
+]
+
+for path in reversed(PATHS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+# Spawned worker processes find them through the environment
+os.environ["PYTHONPATH"] = os.pathsep.join(
+    PATHS + [p for p in [os.environ.get("PYTHONPATH")] if p]
+)
@@ -0,0 +1,37 @@
+from attrs import Factory, define, field
+from griptape.artifacts import TextArtifact
+from griptape.common import (
+    DeltaMessage,
+    Message,
+    TextDeltaMessageContent,
+    TextMessageContent,
+)
+from griptape.drivers.prompt import BasePromptDriver
+from griptape.tokenizers import SimpleTokenizer
+
+ANSWER = "Done."
+
+
+@define
+class FakePromptDriver(BasePromptDriver):
+    """Answers every prompt with ANSWER without calling a model."""
+
+    model: str = field(default="fake", kw_only=True)
+    tokenizer: SimpleTokenizer = field(
+        default=Factory(
+            lambda: SimpleTokenizer(
+                characters_per_token=4, max_input_tokens=8000, max_output_tokens=1000
+            )
+        ),
+        kw_only=True,
+    )
+
+    def try_run(self, prompt_stack):
+        return Message(
+            content=[TextMessageContent(TextArtifact(ANSWER))],
+            role=Message.ASSISTANT_ROLE,
+            usage=Message.Usage(input_tokens=0, output_tokens=0),
+        )
+
+    def try_stream(self, prompt_stack):
+        yield DeltaMessage(content=TextDeltaMessageContent(ANSWER))
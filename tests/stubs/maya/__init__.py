@@ -0,0 +1 @@
+"""A stand-in for the parts of Maya the tests touch, so they run without Maya."""
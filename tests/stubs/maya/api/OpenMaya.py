@@ -0,0 +1,16 @@
+class _Anything:
+    """Stands in for any OpenMaya class, constant or function."""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+class MPxCommand:
+    """Plug-in commands subclass this, so it has to be a real class."""
+
+
+def __getattr__(name):
+    return _Anything()
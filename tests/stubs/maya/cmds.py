@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+# Scene files named like this make `file(open=True)` misbehave
+CRASH_MARKER = "crash"
+FAIL_MARKER = "fail"
+
+_scene = ""
+
+
+def file(path=None, open=False, q=False, sceneName=False, **kwargs):
+    global _scene
+    if q:
+        return _scene
+    if open:
+        name = os.path.basename(path)
+        if CRASH_MARKER in name:
+            os._exit(1)  # like Maya crashing on a corrupt scene
+        if FAIL_MARKER in name:
+            raise RuntimeError(f"Could not open {name}")
+        _scene = path
+    return None
+
+
+def ls(*args, **kwargs):
+    return []
+
+
+def internalVar(userAppDir=False, **kwargs):
+    return tempfile.gettempdir() + os.sep
+
+
+def __getattr__(name):
+    def command(*args, **kwargs):
+        return None
+
+    return command
@@ -0,0 +1,6 @@
+def initialize(name=None):
+    pass
+
+
+def uninitialize():
+    pass
@@ -0,0 +1,6 @@
+def executeInMainThreadWithResult(function, *args, **kwargs):
+    return function(*args, **kwargs)
+
+
+def executeDeferred(function, *args, **kwargs):
+    function(*args, **kwargs)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from fake_driver import ANSWER
+
+from griptape_tools.batch_runner import run_files
+
+FAKE_DRIVER = "fake_driver:FakePromptDriver"
+
+
+def make_scenes(folder, names):
+    paths = []
+    for name in names:
+        path = folder / name
+        path.write_text("//Maya ASCII scene\n")
+        paths.append(str(path))
+    return paths
+
+
+def read_records(output):
+    with open(output, encoding="utf-8") as f:
+        return {json.loads(line)["file"]: json.loads(line) for line in f}
+
+
+def test_runs_every_file(tmp_path):
+    files = make_scenes(tmp_path, ["a.ma", "b.ma", "c.ma"])
+    output = tmp_path / "results.jsonl"
+
+    failed = run_files("List the cameras", files, output, prompt_driver=FAKE_DRIVER)
+
+    records = read_records(output)
+    assert failed == 0
+    assert set(records) == set(files)
+    for record in records.values():
+        assert record["status"] == "ok"
+        assert record["output"] == ANSWER
+        assert record["attempts"] == 1
+
+
+def test_failed_file_is_retried(tmp_path):
+    files = make_scenes(tmp_path, ["a.ma", "fail.ma"])
+    output = tmp_path / "results.jsonl"
+
+    failed = run_files(
+        "List the cameras", files, output, retries=2, prompt_driver=FAKE_DRIVER
+    )
+
+    records = read_records(output)
+    assert failed == 1
+    assert records[files[0]]["attempts"] == 1
+    assert records[files[1]]["status"] == "error"
+    assert records[files[1]]["attempts"] == 3
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_crash_is_charged_to_its_file_only(tmp_path, workers):
+    files = make_scenes(tmp_path, ["a.ma", "crash.ma", "c.ma", "d.ma", "e.ma"])
+    output = tmp_path / "results.jsonl"
+
+    failed = run_files(
+        "List the cameras",
+        files,
+        output,
+        workers=workers,
+        retries=1,
+        prompt_driver=FAKE_DRIVER,
+    )
+
+    records = read_records(output)
+    assert failed == 1
+    assert set(records) == set(files)
+    crashed = records.pop(files[1])
+    assert crashed["status"] == "error"
+    assert crashed["error"] == "The worker process crashed"
+    assert crashed["attempts"] == 2
+    for record in records.values():
+        assert record["status"] == "ok"
+        assert record["attempts"] == 1
@@ -0,0 +1,100 @@
+from griptape_tools.command_compiler import (
+    compile_commands,
+    find_maya_statements,
+    format_syntax_error,
+    script_cache,
+)
+
+
+def run(command_list):
+    script = compile_commands(command_list)
+    recorded = []
+    namespace, results = script.create_namespace(
+        on_record=lambda index, result: recorded.append(index)
+    )
+    exec(script.code, namespace)
+    return script, results, recorded
+
+
+def test_records_every_top_level_value():
+    _, results, _ = run(["x = 2", "x * 3", "for i in range(3):\n    x += i"])
+
+    assert results == [
+        {"line": 1, "source": "x = 2", "value": 2},
+        {"line": 2, "source": "x * 3", "value": 6},
+    ]
+
+
+def test_augmented_assignment_keeps_its_line():
+    script, results, _ = run(["x = 0", "x += 5", "y = x", "z = 1"])
+
+    assert [line for line, _ in script.slices] == [1, 2, 2, 3, 4]
+    assert [(r["line"], r["source"], r["value"]) for r in results] == [
+        (1, "x = 0", 0),
+        (2, "x += 5", 5),
+        (3, "y = x", 5),
+        (4, "z = 1", 1),
+    ]
+
+
+def test_statements_on_one_line_are_recorded_separately():
+    _, results, recorded = run(["a = 1; b = 2", "c = a + b"])
+
+    assert [(r["line"], r["source"], r["value"]) for r in results] == [
+        (1, "a = 1", 1),
+        (1, "b = 2", 2),
+        (2, "c = a + b", 3),
+    ]
+    assert recorded == [0, 1, 2]
+
+
+def test_multiline_statement_source():
+    _, results, _ = run(["values = [\n    1,\n    2,\n]", "len(values)"])
+
+    assert results[0]["source"] == "values = [\n    1,\n    2,\n]"
+    assert results[1] == {"line": 5, "source": "len(values)", "value": 2}
+
+
+def test_compiled_scripts_are_cached():
+    script_cache.clear()
+
+    first = compile_commands(["a = 1"])
+    second = compile_commands(["a = 1"])
+
+    assert first is second
+    assert (script_cache.hits, script_cache.misses) == (1, 1)
+
+
+def test_syntax_error_names_the_line():
+    try:
+        compile_commands(["a = 1", "b = (", "c = 3"])
+    except SyntaxError as e:
+        message = format_syntax_error(e)
+    assert message.startswith("Syntax error on line 2")
+
+
+def test_maya_statements_are_found():
+    script = compile_commands(
+        [
+            "import math",
+            "size = math.sqrt(4)",
+            "cube = cmds.polyCube(width=size)",
+            "names = cmds.ls()",
+            "count = len(names)",
+            "shape = cube[0]",
+            "from maya import mel",
+            "mel.eval('ls')",
+        ]
+    )
+
+    # cmds results are plain data, so using them doesn't need the main thread
+    assert script.maya_slices == (False, False, True, True, False, False, True, True)
+
+
+def test_functions_using_maya_taint_their_callers():
+    flags = compile_commands(
+        ["total = make(3)", "def make(n):\n    return cmds.polyCube()", "x = 1"]
+    ).maya_slices
+
+    assert flags == (True, True, False)
+    assert find_maya_statements([]) == ()
@@ -0,0 +1,88 @@
+import pytest
+from griptape.artifacts import TextArtifact
+from griptape.memory.structure import Run
+
+from griptape_tools import conversation_store
+from griptape_tools.conversation_store import (
+    JsonlConversationMemoryDriver,
+    get_conversation_path,
+)
+
+
+def make_runs(count, start=0):
+    return [
+        Run(
+            input=TextArtifact(f"question {i}"),
+            output=TextArtifact(f"answer {i} " + "x" * (i % 7) * 20),
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def questions(runs):
+    return [int(run.input.value.split()[1]) for run in runs]
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    # Reads split lines often, so partial lines are carried between reads
+    monkeypatch.setattr(conversation_store, "READ_CHUNK_SIZE", 100)
+
+
+def test_load_reads_the_last_runs(tmp_path, small_reads):
+    path = str(tmp_path / "chat.jsonl")
+    runs = make_runs(25)
+    JsonlConversationMemoryDriver(persist_file=path).store(runs, {"scene": "a.ma"})
+
+    driver = JsonlConversationMemoryDriver(persist_file=path, load_last_n=5)
+    loaded, metadata = driver.load()
+
+    assert questions(loaded) == [20, 21, 22, 23, 24]
+    assert [run.id for run in loaded] == [run.id for run in runs[20:]]
+    assert metadata == {"scene": "a.ma"}
+
+
+def test_older_runs_are_paged_backwards(tmp_path, small_reads):
+    path = str(tmp_path / "chat.jsonl")
+    JsonlConversationMemoryDriver(persist_file=path).store(make_runs(25), {})
+
+    driver = JsonlConversationMemoryDriver(persist_file=path, load_last_n=5)
+    driver.load()
+    pages = []
+    while driver.has_older():
+        pages.append(questions(driver.load_older(8)))
+
+    assert pages == [list(range(12, 20)), list(range(4, 12)), list(range(4))]
+    assert driver.load_older() == []
+
+
+def test_store_only_appends_new_runs(tmp_path):
+    path = str(tmp_path / "chat.jsonl")
+    driver = JsonlConversationMemoryDriver(persist_file=path)
+    runs = make_runs(3)
+
+    driver.store(runs, {})
+    driver.store(runs + make_runs(2, start=3), {})
+
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 5
+    loaded, _ = JsonlConversationMemoryDriver(persist_file=path).load()
+    assert questions(loaded) == [0, 1, 2, 3, 4]
+
+
+def test_missing_log_loads_empty(tmp_path):
+    driver = JsonlConversationMemoryDriver(persist_file=str(tmp_path / "none.jsonl"))
+
+    assert driver.load() == ([], {})
+    assert not driver.has_older()
+
+
+def test_each_scene_gets_its_own_log(tmp_path):
+    first = get_conversation_path("/scenes/shot 1.ma", str(tmp_path))
+    second = get_conversation_path("/other/shot 1.ma", str(tmp_path))
+
+    assert first != second
+    assert first.startswith(str(tmp_path / "shot_1-"))
+    assert get_conversation_path("", str(tmp_path)).startswith(
+        str(tmp_path / "untitled-")
+    )
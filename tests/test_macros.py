@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from griptape_tools import macros
+from griptape_tools.macros import (
+    delete_macro,
+    list_macros,
+    load_macro,
+    make_macro,
+    save_macro,
+)
+
+
+@pytest.fixture
+def macro_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(macros, "get_macro_dir", lambda: str(tmp_path))
+    macros._loaded.clear()
+    return tmp_path
+
+
+def test_numeric_settings_become_parameters():
+    macro = make_macro(
+        "spheres",
+        [
+            "for i in range(5):",
+            "    cmds.polySphere(radius=2.5, name='ball')",
+            "cmds.move(0, 1, 0, relative=True)",
+            "cmds.xform(translation=[1, 2, 3], worldSpace=True)",
+        ],
+    )
+
+    assert macro.parameters == {
+        "count": 5,
+        "radius": 2.5,
+        "translation": [1, 2, 3],
+    }
+    assert "range(count)" in macro.source
+    assert "name='ball'" in macro.source
+    assert "relative=True" in macro.source
+
+
+def test_parameters_avoid_builtins_and_script_names():
+    macro = make_macro(
+        "shadowed",
+        [
+            "size = 1",
+            "cmds.polyCube(size=2, width=3)",
+            "cmds.polyCube(width=4, max=5)",
+        ],
+    )
+
+    assert macro.parameters == {"size_2": 2, "width": 3, "width_2": 4, "max_2": 5}
+
+
+def test_saved_macro_runs_with_new_values(macro_dir):
+    save_macro("Offset", ["x = 10", "y = x + 1", "cmds.move(0, y, 0, distance=1.5)"])
+
+    macro = load_macro("Offset")
+    namespace = {"cmds": type("cmds", (), {"move": lambda *a, **k: None})}
+    exec(macro.code, {**namespace, **macro.parameters, "distance": 4.0})
+
+    assert macro.parameters == {"distance": 1.5}
+    assert list_macros() == ["Offset"]
+
+
+def test_names_with_the_same_file_name_keep_their_own_files(macro_dir):
+    names = ["My Macro", "My-Macro", "my macro!"]
+    for number, name in enumerate(names, 1):
+        save_macro(name, [f"a = cmds.polyCube(width={number})"])
+
+    assert list_macros() == sorted(names)
+    for number, name in enumerate(names, 1):
+        assert load_macro(name).parameters == {"width": number}
+    assert len(os.listdir(macro_dir)) == 6
+
+    delete_macro("My Macro")
+    assert load_macro("my macro!").parameters == {"width": 3}
+    save_macro("Another Macro", ["b = 1"])
+    save_macro("My Macro", ["a = cmds.polyCube(width=9)"])
+    assert load_macro("My Macro").parameters == {"width": 9}
+    assert load_macro("My-Macro").parameters == {"width": 2}
+
+
+def test_saving_again_replaces_the_macro(macro_dir):
+    save_macro("Cube", ["cmds.polyCube(width=1)"])
+    assert load_macro("Cube").parameters == {"width": 1}
+
+    save_macro("Cube", ["cmds.polyCube(width=2)"])
+
+    assert load_macro("Cube").parameters == {"width": 2}
+    assert list_macros() == ["Cube"]
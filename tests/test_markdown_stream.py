@@ -0,0 +1,98 @@
+import re
+
+import pytest
+
+from griptape_tools import markdown_stream
+from griptape_tools.markdown_stream import StreamingMarkdownRenderer, render_blocks
+
+REPLY = """# Cameras
+
+The scene has **three** cameras:
+
+- persp
+- top
+- front
+
+```python
+cmds.ls(type="camera")
+```
+
+Done."""
+
+
+def stream(text, size):
+    """Feeds text in chunks of `size`; returns the finished blocks and the
+    open block after each chunk."""
+    renderer = StreamingMarkdownRenderer()
+    finished, open_blocks = [], []
+    for start in range(0, len(text), size):
+        done, open_block = renderer.feed(text[start : start + size])
+        finished.extend(done)
+        open_blocks.append(open_block)
+    return finished + renderer.finish(), open_blocks
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 50])
+def test_streaming_gives_the_same_blocks_however_it_is_split(size):
+    blocks, _ = stream(REPLY, size)
+
+    assert blocks == render_blocks(REPLY)
+
+
+def test_blocks():
+    blocks = render_blocks(REPLY)
+
+    assert blocks[0] == "<h1>Cameras</h1>"
+    assert blocks[1] == "<p>The scene has <strong>three</strong> cameras:</p>"
+    assert blocks[2].startswith("<ul>") and "<li>front</li>" in blocks[2]
+    assert blocks[3] == (
+        '<pre><code class="language-python">cmds.ls(type=&quot;camera&quot;)'
+        "</code></pre>"
+    )
+    assert blocks[4] == "<p>Done.</p>"
+
+
+def test_open_block_is_rendered_until_it_is_finished():
+    renderer = StreamingMarkdownRenderer()
+
+    assert renderer.feed("Some **bold") == ([], "<p>Some **bold</p>")
+    assert renderer.feed("** text") == ([], "<p>Some <strong>bold</strong> text</p>")
+    assert renderer.feed("\n\nNext") == (
+        ["<p>Some <strong>bold</strong> text</p>"],
+        "<p>Next</p>",
+    )
+
+
+def test_unclosed_code_block_is_shown_as_code():
+    renderer = StreamingMarkdownRenderer()
+
+    _, open_block = renderer.feed("```\na < b\n")
+
+    assert open_block == "<pre><code>a &lt; b</code></pre>"
+    assert renderer.finish() == ["<pre><code>a &lt; b</code></pre>"]
+
+
+def test_list_started_straight_after_a_paragraph():
+    blocks = render_blocks("Cameras:\n- persp\n- top")
+
+    assert blocks[0] == "<p>Cameras:</p>"
+    assert blocks[1].startswith("<ul>")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "\n".join(f"line {i}" for i in range(8)),
+        "\n".join(f"- item {i}" for i in range(8)),
+        "```\n" + "\n".join(f"code {i}" for i in range(8)) + "\n```",
+    ],
+    ids=["paragraph", "list", "code"],
+)
+def test_long_open_blocks_are_cut(monkeypatch, text):
+    monkeypatch.setattr(markdown_stream, "MAX_OPEN_LINES", 3)
+
+    blocks, open_blocks = stream(text, 4)
+
+    assert len(blocks) == 3
+    # At most the cap in complete lines, plus the line still coming in
+    assert max(len(re.findall(r"\w+ \d", block)) for block in open_blocks) <= 4
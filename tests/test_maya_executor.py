@@ -0,0 +1,128 @@
+import maya.cmds as cmds
+import pytest
+
+from griptape_tools.command_compiler import compile_commands
+from griptape_tools.maya_executor import (
+    BULK_THRESHOLD,
+    SLICED_THRESHOLD,
+    SlicedRun,
+    choose_mode,
+    run_batch,
+)
+
+
+@pytest.fixture
+def undo_calls(monkeypatch):
+    """Records the undo chunks opened and closed."""
+    calls = []
+
+    def undoInfo(**kwargs):
+        if kwargs.get("openChunk"):
+            calls.append("open")
+        elif kwargs.get("closeChunk"):
+            calls.append("close")
+        return True
+
+    monkeypatch.setattr(cmds, "undoInfo", undoInfo, raising=False)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "length, expected",
+    [
+        (1, "default"),
+        (BULK_THRESHOLD - 1, "default"),
+        (BULK_THRESHOLD, "bulk"),
+        (SLICED_THRESHOLD, "sliced"),
+    ],
+)
+def test_mode_follows_the_list_length(length, expected):
+    assert choose_mode(["x = 1"] * length) == expected
+
+
+def test_given_mode_wins():
+    assert choose_mode(["x = 1"], "hybrid") == "hybrid"
+    assert choose_mode(["x = 1"] * SLICED_THRESHOLD, "default") == "default"
+
+
+def test_without_a_session_interactive_modes_run_in_bulk():
+    assert choose_mode(["x = 1"], "sliced", interactive=False) == "bulk"
+    assert choose_mode(["x = 1"], "hybrid", interactive=False) == "bulk"
+    assert choose_mode(["x = 1"] * SLICED_THRESHOLD, interactive=False) == "bulk"
+    assert choose_mode(["x = 1"], "bulk_no_undo", interactive=False) == "bulk_no_undo"
+
+
+def test_unknown_mode_is_refused():
+    with pytest.raises(ValueError, match="Unknown execution mode"):
+        choose_mode(["x = 1"], "fast")
+
+
+def test_batch_closes_its_chunk_when_it_fails(undo_calls):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_batch(fail)
+    assert undo_calls == ["open", "close"]
+
+
+def sliced_run(command_list, **options):
+    script = compile_commands(command_list)
+    namespace, _ = script.create_namespace()
+    run = SlicedRun(script, namespace, **options)
+    run.start()
+    return run, namespace
+
+
+def test_sliced_run_runs_to_the_end(undo_calls):
+    progress = []
+    run, namespace = sliced_run(
+        ["a = 1", "b = a + 1", "c = b + 1"],
+        on_progress=lambda done, total: progress.append((done, total)),
+        budget_ms=0,
+    )
+
+    while not run.done:
+        run._run_slice()
+
+    assert namespace["c"] == 3
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert undo_calls == ["open", "close"]
+
+
+def test_sliced_run_stops_when_cancelled(undo_calls):
+    run, namespace = sliced_run(["a = 1", "b = 2"], budget_ms=0)
+
+    run._run_slice()
+    run.cancel_event.set()
+    run._run_slice()
+
+    assert run.done and run.cancelled
+    assert run.position == 1
+    assert "b" not in namespace
+    assert undo_calls == ["open", "close"]
+
+
+def test_sliced_run_records_system_exit(undo_calls):
+    run, _ = sliced_run(["a = 1", "raise SystemExit(2)", "b = 2"])
+
+    run._run_slice()
+
+    assert run.done and run.wait(0)
+    assert isinstance(run.error, SystemExit)
+    assert run.error_line == 2
+    assert undo_calls == ["open", "close"]
+
+
+def test_sliced_run_ends_when_progress_callback_fails(undo_calls):
+    def on_progress(done, total):
+        raise KeyboardInterrupt
+
+    run, _ = sliced_run(["a = 1", "b = 2"], on_progress=on_progress, budget_ms=0)
+
+    with pytest.raises(KeyboardInterrupt):
+        run._run_slice()
+
+    assert run.done
+    assert isinstance(run.error, KeyboardInterrupt)
+    assert undo_calls == ["open", "close"]
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from griptape_tools.result_encoder import (
+    collapse_names,
+    compact,
+    encode_results,
+    preview,
+    read_result_page,
+    result_rows,
+)
+
+
+def test_numbered_names_are_collapsed():
+    names = [f"pCube{i}" for i in range(1, 6)] + ["camera1", "light2", "light3"]
+
+    assert collapse_names(names) == ["pCube1..pCube5", "camera1", "light2", "light3"]
+
+
+def test_compact_rounds_and_summarizes_long_numeric_lists():
+    assert compact([1 / 3, float("nan")]) == [0.333333, "nan"]
+    summary = compact(list(range(100)))
+    assert summary == {"count": 100, "min": 0, "max": 99, "mean": 49.5}
+    assert compact(list(range(100)), summarize=False) == list(range(100))
+
+
+def test_results_that_fit_are_sent_in_full():
+    results = [{"line": 1, "source": "values", "value": list(range(30))}]
+
+    assert json.loads(encode_results(results)) == results
+
+
+def test_big_results_can_be_read_back_in_pages():
+    values = [[i, i * 0.5, -i] for i in range(400)]
+    results = [
+        {"line": 1, "source": "names", "value": [f"node_{i}" for i in range(400)]},
+        {"line": 2, "source": "positions", "value": values},
+    ]
+
+    encoded = json.loads(encode_results(results, max_bytes=2000))
+    assert encoded["truncated"]
+    assert encoded["total_rows"] == 800
+
+    rows, offset = [], 0
+    while offset is not None:
+        page = json.loads(
+            read_result_page(encoded["result_id"], offset, limit=300, max_bytes=4000)
+        )
+        rows.extend(page["rows"])
+        offset = page["next_offset"]
+    assert rows == compact(result_rows(results), summarize=False)
+    assert rows[400] == {"line": 2, "index": 0, "value": [0, 0.0, 0]}
+
+
+def test_pages_stay_within_the_budget():
+    results = [{"line": 1, "source": "x", "value": ["x" * 50] * 200}]
+    result_id = json.loads(encode_results(results, max_bytes=500))["result_id"]
+
+    page = read_result_page(result_id, limit=100, max_bytes=500)
+
+    assert len(page) <= 500
+    assert json.loads(page)["next_offset"] is not None
+
+
+def test_unknown_result_id():
+    with pytest.raises(KeyError):
+        read_result_page("result-missing")
+
+
+def test_preview_is_one_short_line():
+    text = preview({"value": list(range(1000))}, max_length=40)
+
+    assert len(text) == 40
+    assert "\n" not in text
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from griptape_tools.voice_input import (
+    LocalTranscriber,
+    SpeechSegmenter,
+    VoiceActivityDetector,
+    VoicePromptPipeline,
+)
+
+SAMPLE_RATE = 44100
+BLOCK = 1024
+
+
+def tone(seconds, amplitude=0.3, frequency=220):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def noise(seconds, amplitude=0.001, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-amplitude, amplitude, int(SAMPLE_RATE * seconds)).astype(
+        np.float32
+    )
+
+
+def blocks(audio):
+    return [audio[start : start + BLOCK] for start in range(0, len(audio), BLOCK)]
+
+
+# Two phrases with a short pause between them, then a long pause
+SPEECH = np.concatenate([noise(0.5), tone(0.5), noise(0.5), tone(0.4), noise(1.5)])
+
+
+def segment(audio):
+    detector = VoiceActivityDetector(SAMPLE_RATE)
+    segmenter = SpeechSegmenter()
+    events = []
+    for block in blocks(audio):
+        frames, flags = detector.process(block)
+        events.extend(segmenter.feed(frames, flags))
+    return events + list(segmenter.flush())
+
+
+def test_detector_flags_speech_but_not_silence_or_hiss():
+    detector = VoiceActivityDetector(SAMPLE_RATE)
+
+    _, quiet = detector.process(noise(0.5))
+    _, hiss = detector.process(noise(0.5, amplitude=0.012, seed=1))
+    _, speech = detector.process(tone(0.5))
+
+    assert not quiet.any()
+    assert not hiss.any()
+    assert speech.all()
+
+
+def test_detector_keeps_leftover_samples_for_the_next_block():
+    detector = VoiceActivityDetector(SAMPLE_RATE)
+    frame = detector.frame_length
+
+    frames, flags = detector.process(tone(0.5)[: frame + 10])
+    assert frames.shape == (1, frame) and len(flags) == 1
+    frames, _ = detector.process(tone(0.5)[: frame - 10])
+    assert frames.shape == (1, frame)
+
+
+def test_pauses_split_segments_and_end_the_utterance():
+    events = segment(SPEECH)
+
+    assert [kind for kind, _ in events] == ["segment", "segment", "end"]
+    # Each segment has its pre-roll and the pause that ended it around it
+    lengths = [len(samples) / SAMPLE_RATE for _, samples in events[:2]]
+    assert lengths == pytest.approx([1.0, 0.9], abs=0.05)
+
+
+def test_short_clicks_are_ignored():
+    events = segment(np.concatenate([noise(0.5), tone(0.05), noise(1.5)]))
+
+    assert events == []
+
+
+def test_flush_ends_speech_in_progress():
+    events = segment(np.concatenate([noise(0.5), tone(0.5)]))
+
+    assert [kind for kind, _ in events] == ["segment", "end"]
+
+
+def test_pipeline_sends_each_utterance_as_one_message():
+    messages = []
+    transcriber = LocalTranscriber(["Make a cube", "and a sphere", "Delete it"])
+    pipeline = VoicePromptPipeline(messages.append, transcriber, SAMPLE_RATE)
+
+    for block in blocks(np.concatenate([SPEECH, tone(0.5), noise(1.5)])):
+        pipeline.process(block)
+    pipeline._transcription.shutdown(wait=True)
+
+    assert messages == ["Make a cube and a sphere", "Delete it"]
+    assert len(transcriber.segments) == 3
+
+
+def test_pipeline_drops_speech_after_teardown():
+    messages = []
+    pipeline = VoicePromptPipeline(messages.append, LocalTranscriber(), SAMPLE_RATE)
+
+    pipeline.teardown()
+    for block in blocks(SPEECH):
+        pipeline.process(block)
+
+    assert messages == []
+
+
+def test_local_transcriber_names_untranscribed_segments():
+    transcriber = LocalTranscriber(["hello"])
+
+    assert transcriber.transcribe(tone(0.5), SAMPLE_RATE) == "hello"
+    assert transcriber.transcribe(tone(1.5), SAMPLE_RATE) == "[1.5s of speech]"
+    assert transcriber.segments == pytest.approx([0.5, 1.5])